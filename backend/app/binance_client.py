@@ -1,14 +1,44 @@
 from __future__ import annotations
 
+import sys
+import threading
+from collections import OrderedDict
+from operator import itemgetter
 from typing import Dict, List, Optional, Tuple
 
 import httpx
 
 from .config import resolve_binance_symbol
+from .json_codec import loads as json_loads
 
 _BINANCE_API = "https://api.binance.com"
 _MAX_LIMIT = 1000
-_EARLIEST_CACHE: Dict[Tuple[str, str], int] = {}
+_EARLIEST_CACHE_SIZE = 64
+_EARLIEST_CACHE: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+_EARLIEST_CACHE_LOCK = threading.Lock()
+_CLIENT: Optional[httpx.AsyncClient] = None
+# open time, close time, open, high, low, close, volume
+_KLINE_FIELDS = itemgetter(0, 6, 1, 2, 3, 4, 5)
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared client so backfill pages reuse one warm connection."""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            base_url=_BINANCE_API,
+            timeout=10.0,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=8),
+        )
+    return _CLIENT
+
+
+async def aclose_client() -> None:
+    global _CLIENT
+    client, _CLIENT = _CLIENT, None
+    if client is not None:
+        await client.aclose()
 
 
 async def _request_klines(
@@ -28,24 +58,26 @@ async def _request_klines(
     if end_ts is not None:
         params["endTime"] = int(end_ts) * 1000
 
-    async with httpx.AsyncClient(base_url=_BINANCE_API, timeout=10.0) as client:
-        response = await client.get("/api/v3/klines", params=params)
-        response.raise_for_status()
-        payload = response.json()
+    response = await _get_client().get("/api/v3/klines", params=params)
+    response.raise_for_status()
+    # Parse the raw body directly rather than via response.json(), which decodes
+    # to str first and then runs the stdlib parser.
+    payload = json_loads(response.content)
 
+    # Binance sends prices as strings, so the float() casts stay; pulling all fields
+    # with one itemgetter call keeps the per-row work to a tuple unpack.
     candles: List[dict] = []
-    for entry in payload:
-        open_time_ms = int(entry[0])
-        close_time_ms = int(entry[6])
-        candles.append(
+    append = candles.append
+    for open_ms, close_ms, o, h, l, c, v in map(_KLINE_FIELDS, payload):
+        append(
             {
-                "time": open_time_ms // 1000,
-                "close_time": close_time_ms // 1000,
-                "open": float(entry[1]),
-                "high": float(entry[2]),
-                "low": float(entry[3]),
-                "close": float(entry[4]),
-                "volume": float(entry[5]),
+                "time": open_ms // 1000,
+                "close_time": close_ms // 1000,
+                "open": float(o),
+                "high": float(h),
+                "low": float(l),
+                "close": float(c),
+                "volume": float(v),
             }
         )
     return candles
@@ -70,14 +102,20 @@ async def fetch_latest(symbol: str, interval: str, limit: int = 500) -> List[dic
 
 
 async def fetch_earliest_open_time(symbol: str, interval: str) -> Optional[int]:
-    key = (symbol.upper(), interval)
-    if key in _EARLIEST_CACHE:
-        return _EARLIEST_CACHE[key]
+    key = (sys.intern(symbol.upper()), sys.intern(interval))
+    cached = _EARLIEST_CACHE.get(key)
+    if cached is not None:
+        return cached
 
     candles = await fetch_klines(symbol, interval, start_ts=0, limit=1)
     if not candles:
         return None
 
     earliest = candles[0]["time"]
-    _EARLIEST_CACHE[key] = earliest
+    # Reads stay lock-free; only inserts (and evictions) are serialized.
+    with _EARLIEST_CACHE_LOCK:
+        _EARLIEST_CACHE[key] = earliest
+        _EARLIEST_CACHE.move_to_end(key)
+        while len(_EARLIEST_CACHE) > _EARLIEST_CACHE_SIZE:
+            _EARLIEST_CACHE.popitem(last=False)
     return earliest
\ No newline at end of file
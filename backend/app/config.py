@@ -1,7 +1,10 @@
 from dataclasses import dataclass
 from datetime import timedelta
+from functools import lru_cache
+import sys
 from pathlib import Path
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Mapping, Tuple
 
 
 @dataclass(frozen=True)
@@ -15,23 +18,31 @@ DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
-INSTRUMENTS: List[Instrument] = [
+# A tuple so the lookup tables derived from it (here and in main) cannot go stale.
+INSTRUMENTS: Tuple[Instrument, ...] = (
     Instrument(symbol="ETH", name="Ethereum", binance_symbol="ETHUSDT"),
     Instrument(symbol="BTC", name="Bitcoin", binance_symbol="BTCUSDT"),
-]
-
-INTERVAL_MINUTES: Dict[str, int] = {
-    "1m": 1,
-    "5m": 5,
-    "15m": 15,
-    "1h": 60,
-    "4h": 240,
-    "1d": 1440,
-}
-
-INTERVAL_SECONDS: Dict[str, int] = {key: value * 60 for key, value in INTERVAL_MINUTES.items()}
-
-
+)
+
+# Read-only lookup tables; keys are interned since they end up in cache-key tuples.
+INTERVAL_MINUTES: Mapping[str, int] = MappingProxyType({
+    sys.intern(key): value
+    for key, value in {
+        "1m": 1,
+        "5m": 5,
+        "15m": 15,
+        "1h": 60,
+        "4h": 240,
+        "1d": 1440,
+    }.items()
+})
+
+INTERVAL_SECONDS: Mapping[str, int] = MappingProxyType(
+    {key: value * 60 for key, value in INTERVAL_MINUTES.items()}
+)
+
+
+@lru_cache(maxsize=32)
 def interval_to_timedelta(interval: str) -> timedelta:
     minutes = INTERVAL_MINUTES.get(interval)
     if minutes is None:
@@ -39,9 +50,12 @@ def interval_to_timedelta(interval: str) -> timedelta:
     return timedelta(minutes=minutes)
 
 
-SYMBOL_TO_BINANCE: Dict[str, str] = {instrument.symbol: instrument.binance_symbol for instrument in INSTRUMENTS}
+SYMBOL_TO_BINANCE: Mapping[str, str] = MappingProxyType({
+    sys.intern(instrument.symbol): sys.intern(instrument.binance_symbol) for instrument in INSTRUMENTS
+})
 
 
+@lru_cache(maxsize=32)
 def resolve_binance_symbol(symbol: str) -> str:
     try:
         return SYMBOL_TO_BINANCE[symbol.upper()]
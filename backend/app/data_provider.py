@@ -1,19 +1,21 @@
 from __future__ import annotations
 
 import asyncio
-from asyncio import QueueEmpty
-import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import time
 from datetime import datetime, timezone
-from typing import AsyncGenerator, Dict, List, Optional, Set, Tuple
+from operator import itemgetter
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, List, Optional, Tuple, TypeVar, Union
 
-from starlette.concurrency import run_in_threadpool
 import websockets
 from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
 import ssl, certifi
 
 from .binance_client import fetch_earliest_open_time, fetch_klines
 from .config import INSTRUMENTS, INTERVAL_SECONDS, Instrument, resolve_binance_symbol
+from .json_codec import JSONDecodeError, loads as json_loads
 from .storage import (
     fetch_after as storage_fetch_after,
     fetch_candles as storage_fetch_candles,
@@ -25,11 +27,32 @@ from .storage import (
 
 UTC = timezone.utc
 MAX_REMOTE_BATCH = 1000
+# Backfill pages are buffered and written in one transaction up to this size.
+BACKFILL_FLUSH_ROWS = 10 * MAX_REMOTE_BATCH
+# Parallel page requests across all backfills; keeps us well under Binance's weight limit.
+BACKFILL_CONCURRENCY = 4
+# Recent stream payloads kept per (symbol, interval); slower readers skip ahead.
+STREAM_BUFFER_SIZE = 512
 BINANCE_WS_URL = "wss://stream.binance.com/ws"
 SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+# Kline event fields; open/close times arrive as integers, prices as strings.
+_KLINE_FIELDS = itemgetter("t", "T", "o", "h", "l", "c", "v")
+# Kline frames are small and Binance does not deflate them, so skip negotiating
+# compression; a short incoming queue is enough since each frame is handled inline.
+_WS_CONNECT_OPTIONS = dict(
+    ssl=SSL_CONTEXT,
+    ping_interval=20,
+    ping_timeout=20,
+    open_timeout=30,
+    compression=None,
+    max_queue=64,
+    max_size=2**20,
+)
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # latest live close price per (symbol, interval)
 _LAST_PRICE: Dict[Tuple[str, str], float] = {}
 
@@ -40,37 +63,42 @@ async def get_live_price_ws(symbol: str, interval: str, timeout: float = 1.5) ->
     """Await the next WS tick for symbol/interval and return its close price.
     Raises asyncio.TimeoutError on timeout.
     """
-    state, queue = await _subscribe_stream(symbol, interval)
-    try:
-        import asyncio as _asyncio
-        payload = await _asyncio.wait_for(queue.get(), timeout=timeout)
-        candle = payload.get("candle") if isinstance(payload, dict) else None
-        if not candle or "close" not in candle:
-            raise RuntimeError("Invalid WS payload for price")
-        return float(candle["close"])
-    finally:
-        await _unsubscribe_stream(state, queue)
+    _, subscription = await _subscribe_stream(symbol, interval)
+    payload = await asyncio.wait_for(subscription.get(), timeout=timeout)
+    candle = payload.get("candle") if isinstance(payload, dict) else None
+    if not candle or "close" not in candle:
+        raise RuntimeError("Invalid WS payload for price")
+    return float(candle["close"])
 
 class _StreamState:
     __slots__ = (
         "symbol",
         "interval",
+        "key",
+        "step",
         "binance_symbol",
+        "stream_url",
         "task",
         "task_lock",
-        "subscribers",
-        "sub_lock",
+        "ring",
+        "seq",
+        "cond",
         "latest_time",
     )
 
     def __init__(self, symbol: str, interval: str) -> None:
         self.symbol = symbol
         self.interval = interval
+        self.key = (symbol, interval)
+        self.step = INTERVAL_SECONDS[interval]
         self.binance_symbol = resolve_binance_symbol(symbol)
+        self.stream_url = f"{BINANCE_WS_URL}/{self.binance_symbol.lower()}@kline_{interval}"
         self.task: Optional[asyncio.Task[None]] = None
         self.task_lock = asyncio.Lock()
-        self.subscribers: Set[asyncio.Queue[dict]] = set()
-        self.sub_lock = asyncio.Lock()
+        # Shared by every subscriber; see _broadcast and _Subscription.
+        self.ring: Deque[dict] = deque(maxlen=STREAM_BUFFER_SIZE)
+        self.seq = 0
+        self.cond = asyncio.Condition()
         self.latest_time: Optional[int] = None
 
     async def ensure_task(self) -> None:
@@ -80,21 +108,20 @@ class _StreamState:
 
     async def _run(self) -> None:
         backoff = 1.0
-        step = INTERVAL_SECONDS[self.interval]
+        step = self.step
         while True:
             try:
                 self.latest_time = await _ensure_latest(self.symbol, self.interval)
                 if self.latest_time is None:
-                    self.latest_time = _align_timestamp(int(datetime.now(tz=UTC).timestamp()), step)
+                    self.latest_time = _now_aligned(step)
 
                 # Drain any stored candles after latest_time (e.g., produced while no stream running)
-                pending = await run_in_threadpool(storage_fetch_after, self.symbol, self.interval, self.latest_time)
+                pending = await _run_db(storage_fetch_after, self.symbol, self.interval, self.latest_time)
                 for candle in pending:
                     self.latest_time = candle["time"]
                     await _broadcast(self, {"candle": candle, "final": True})
 
-                stream_url = f"{BINANCE_WS_URL}/{self.binance_symbol.lower()}@kline_{self.interval}"
-                async with websockets.connect(stream_url, ssl=SSL_CONTEXT, ping_interval=20, ping_timeout=20, open_timeout=30) as ws:
+                async with websockets.connect(self.stream_url, **_WS_CONNECT_OPTIONS) as ws:
                     logger.info("Connected Binance stream %s %s", self.symbol, self.interval)
                     backoff = 1.0
                     async for message in ws:
@@ -112,10 +139,10 @@ class _StreamState:
                 await asyncio.sleep(backoff)
                 backoff = min(backoff * 2.0, 30.0)
 
-    async def _handle_message(self, message: str) -> None:
+    async def _handle_message(self, message: Union[str, bytes]) -> None:
         try:
-            payload = json.loads(message)
-        except json.JSONDecodeError:
+            payload = json_loads(message)
+        except JSONDecodeError:
             logger.debug("Skipping non-JSON message from Binance stream")
             return
 
@@ -123,22 +150,23 @@ class _StreamState:
         if not kline:
             return
 
+        open_ms, close_ms, o, h, l, c, v = _KLINE_FIELDS(kline)
         candle = {
-            "time": int(kline["t"]) // 1000,
-            "close_time": int(kline["T"]) // 1000,
-            "open": float(kline["o"]),
-            "high": float(kline["h"]),
-            "low": float(kline["l"]),
-            "close": float(kline["c"]),
-            "volume": float(kline["v"]),
+            "time": open_ms // 1000,
+            "close_time": close_ms // 1000,
+            "open": float(o),
+            "high": float(h),
+            "low": float(l),
+            "close": float(c),
+            "volume": float(v),
         }
         # update latest live price cache
         try:
-            _LAST_PRICE[(self.symbol, self.interval)] = candle["close"]
+            _LAST_PRICE[self.key] = candle["close"]
         except Exception:
             pass
 
-        step = INTERVAL_SECONDS[self.interval]
+        step = self.step
         open_time = candle["time"]
 
         is_final = bool(kline.get("x"))
@@ -155,7 +183,7 @@ class _StreamState:
 
         if latest_time is not None and open_time > latest_time + step:
             await _ensure_range(self.symbol, self.interval, latest_time + step, open_time)
-            missing = await run_in_threadpool(storage_fetch_after, self.symbol, self.interval, latest_time)
+            missing = await _run_db(storage_fetch_after, self.symbol, self.interval, latest_time)
             for existing in missing:
                 ts = existing["time"]
                 if ts <= latest_time or ts >= open_time:
@@ -176,39 +204,60 @@ class _StreamState:
         if authoritative:
             candle = authoritative[0]
 
-        await run_in_threadpool(save_candles, self.symbol, self.interval, [candle])
+        await _run_db(save_candles, self.symbol, self.interval, [candle])
         self.latest_time = open_time
         await _broadcast(self, {"candle": candle, "final": True})
 
 
 _STREAMS: Dict[Tuple[str, str], _StreamState] = {}
 _STREAMS_LOCK = asyncio.Lock()
+_BACKFILL_SEMAPHORE = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+# SQLite work gets its own small pool instead of Starlette's shared 40-thread one;
+# two workers are plenty since writes serialize on the database lock anyway.
+_SQLITE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sqlite")
 
 
-async def _broadcast(state: _StreamState, candle: dict) -> None:
-    async with state.sub_lock:
-        if not state.subscribers:
-            return
-        subscribers = list(state.subscribers)
+async def _run_db(func: Callable[..., T], *args: Any) -> T:
+    return await asyncio.get_running_loop().run_in_executor(_SQLITE_EXECUTOR, func, *args)
 
-    to_remove: List[asyncio.Queue[dict]] = []
-    for queue in subscribers:
-        try:
-            queue.put_nowait(candle)
-        except asyncio.QueueFull:
-            try:
-                queue.get_nowait()
-            except QueueEmpty:
-                pass
-            try:
-                queue.put_nowait(candle)
-            except asyncio.QueueFull:
-                to_remove.append(queue)
 
-    if to_remove:
-        async with state.sub_lock:
-            for queue in to_remove:
-                state.subscribers.discard(queue)
+async def _broadcast(state: _StreamState, payload: dict) -> None:
+    # One append into the shared ring plus a wakeup, regardless of subscriber count.
+    state.ring.append(payload)
+    state.seq += 1
+    async with state.cond:
+        state.cond.notify_all()
+
+
+class _Subscription:
+    """Read cursor into a stream's shared ring; nothing to unregister when dropped."""
+
+    __slots__ = ("_state", "_seq")
+
+    def __init__(self, state: _StreamState) -> None:
+        self._state = state
+        self._seq = state.seq
+
+    def _ready(self) -> bool:
+        return self._seq != self._state.seq
+
+    def get_nowait(self) -> dict:
+        state = self._state
+        behind = state.seq - self._seq
+        if not behind:
+            raise asyncio.QueueEmpty
+        ring = state.ring
+        if behind > len(ring):
+            # Lagged past the ring; resume from the oldest payload still held.
+            behind = len(ring)
+        self._seq = state.seq - behind + 1
+        return ring[-behind]
+
+    async def get(self) -> dict:
+        if not self._ready():
+            async with self._state.cond:
+                await self._state.cond.wait_for(self._ready)
+        return self.get_nowait()
 
 
 async def _get_stream_state(symbol: str, interval: str) -> _StreamState:
@@ -222,20 +271,12 @@ async def _get_stream_state(symbol: str, interval: str) -> _StreamState:
     return state
 
 
-async def _subscribe_stream(symbol: str, interval: str) -> Tuple[_StreamState, asyncio.Queue[dict]]:
+async def _subscribe_stream(symbol: str, interval: str) -> Tuple[_StreamState, _Subscription]:
     state = await _get_stream_state(symbol, interval)
-    queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=512)
-    async with state.sub_lock:
-        state.subscribers.add(queue)
-    return state, queue
+    return state, _Subscription(state)
 
 
-async def _unsubscribe_stream(state: _StreamState, queue: asyncio.Queue[dict]) -> None:
-    async with state.sub_lock:
-        state.subscribers.discard(queue)
-
-
-def list_instruments() -> List[Instrument]:
+def list_instruments() -> Tuple[Instrument, ...]:
     return INSTRUMENTS
 
 
@@ -245,49 +286,67 @@ def _align_timestamp(ts: int, step: int) -> int:
     return (ts // step) * step
 
 
-def _find_invalid_candle_times(candles: List[dict], step: int) -> List[int]:
-    invalid: List[int] = []
-    if not candles:
-        return invalid
-
-    min_span = step - 1
-    last_index = len(candles) - 1
+def _now_aligned(step: int) -> int:
+    # time.time() avoids building a tz-aware datetime just to read the clock.
+    now = int(time.time())
+    return now - now % step
 
-    for idx, candle in enumerate(candles):
-        if idx == last_index:
-            # Allow the very latest candle to be incomplete; realtime data will fill it later.
-            continue
 
-        open_time = int(candle.get("time", 0))
-        close_time = int(candle.get("close_time", 0))
-        open_price = float(candle.get("open", 0.0))
-        high_price = float(candle.get("high", 0.0))
-        low_price = float(candle.get("low", 0.0))
-        close_price = float(candle.get("close", 0.0))
+def _index_at_or_after(candles: List[dict], ts: int) -> int:
+    lo, hi = 0, len(candles)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if candles[mid]["time"] < ts:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
 
-        if close_time < open_time + min_span:
-            invalid.append(open_time)
-            continue
 
-        if high_price < low_price:
-            invalid.append(open_time)
-            continue
+def _find_invalid_candle_times(candles: List[dict], step: int) -> List[int]:
+    invalid: List[int] = []
+    min_span = step - 1
 
-        if not (low_price <= open_price <= high_price) or not (low_price <= close_price <= high_price):
+    # Allow the very latest candle to be incomplete; realtime data will fill it later.
+    # Rows come from storage with typed values, so no per-field coercion is needed, and
+    # high < low already fails the open/close range checks.
+    for candle in candles[:-1]:
+        open_time = candle["time"]
+        low = candle["low"]
+        high = candle["high"]
+        if (
+            candle["close_time"] < open_time + min_span
+            or not low <= candle["open"] <= high
+            or not low <= candle["close"] <= high
+        ):
             invalid.append(open_time)
-            continue
 
     return invalid
 
 
+async def _fetch_windows(symbol: str, interval: str, windows: List[Tuple[int, int]]) -> List[dict]:
+    async def fetch(window: Tuple[int, int]) -> List[dict]:
+        async with _BACKFILL_SEMAPHORE:
+            return await fetch_klines(
+                symbol,
+                interval,
+                start_ts=window[0],
+                end_ts=window[1],
+                limit=MAX_REMOTE_BATCH,
+            )
+
+    pages = await asyncio.gather(*(fetch(window) for window in windows))
+    return [candle for page in pages for candle in page]
+
+
 async def _ensure_range(symbol: str, interval: str, start_ts: int, end_ts: int) -> None:
     if start_ts > end_ts:
         return
 
     step = INTERVAL_SECONDS[interval]
-    start_ts = _align_timestamp(start_ts, step)
-    end_ts = _align_timestamp(end_ts, step)
-    now_ts = _align_timestamp(int(datetime.now(tz=UTC).timestamp()), step)
+    start_ts = 0 if start_ts < 0 else start_ts - start_ts % step
+    end_ts = 0 if end_ts < 0 else end_ts - end_ts % step
+    now_ts = _now_aligned(step)
     max_closed_ts = max(0, now_ts - step)
     effective_end = min(end_ts, max_closed_ts)
 
@@ -295,34 +354,58 @@ async def _ensure_range(symbol: str, interval: str, start_ts: int, end_ts: int)
         return
 
     current_start = start_ts
+    page_span = step * MAX_REMOTE_BATCH
+    pages_per_flush = max(BACKFILL_FLUSH_ROWS // MAX_REMOTE_BATCH, 1)
 
     while current_start <= effective_end:
-        missing = await run_in_threadpool(find_missing_segment, symbol, interval, current_start, effective_end)
+        missing = await _run_db(find_missing_segment, symbol, interval, current_start, effective_end)
         if not missing:
             break
 
         missing_start, missing_end = missing
         fetch_start = missing_start
+        pending: List[dict] = []
 
-        while fetch_start <= missing_end:
-            batch = await fetch_klines(
-                symbol,
-                interval,
-                start_ts=fetch_start,
-                end_ts=missing_end,
-                limit=MAX_REMOTE_BATCH,
-            )
-            if not batch:
-                return
-
-            await run_in_threadpool(save_candles, symbol, interval, batch)
-
-            last_time = batch[-1]["time"]
-            if last_time >= missing_end:
-                break
-
-            fetch_start = last_time + step
-            await asyncio.sleep(0)
+        try:
+            while fetch_start <= missing_end:
+                if pending and missing_end - fetch_start >= page_span * 2:
+                    # The first page confirmed Binance has data here; fetch the rest
+                    # as fixed windows with several requests in flight.
+                    windows = [
+                        (window_start, min(window_start + page_span - step, missing_end))
+                        for window_start in range(fetch_start, missing_end + 1, page_span)
+                    ]
+                    for idx in range(0, len(windows), pages_per_flush):
+                        pending.extend(await _fetch_windows(symbol, interval, windows[idx:idx + pages_per_flush]))
+                        await _run_db(save_candles, symbol, interval, pending)
+                        pending = []
+                    break
+
+                batch = await fetch_klines(
+                    symbol,
+                    interval,
+                    start_ts=fetch_start,
+                    end_ts=missing_end,
+                    limit=MAX_REMOTE_BATCH,
+                )
+                if not batch:
+                    return
+
+                pending.extend(batch)
+                if len(pending) >= BACKFILL_FLUSH_ROWS:
+                    await _run_db(save_candles, symbol, interval, pending)
+                    pending = []
+
+                last_time = batch[-1]["time"]
+                if last_time >= missing_end:
+                    break
+
+                fetch_start = last_time + step
+                await asyncio.sleep(0)
+        finally:
+            # Persist whatever was fetched, even when a later page fails.
+            if pending:
+                await _run_db(save_candles, symbol, interval, pending)
 
         current_start = missing_end + step
         await asyncio.sleep(0)
@@ -330,18 +413,18 @@ async def _ensure_range(symbol: str, interval: str, start_ts: int, end_ts: int)
 
 async def _ensure_latest(symbol: str, interval: str) -> Optional[int]:
     step = INTERVAL_SECONDS[interval]
-    now_ts = _align_timestamp(int(datetime.now(tz=UTC).timestamp()), step)
-    latest = await run_in_threadpool(get_latest_open_time, symbol, interval)
+    now_ts = _now_aligned(step)
+    latest = await _run_db(get_latest_open_time, symbol, interval)
 
     if latest is None:
         window_start = max(0, now_ts - step * (MAX_REMOTE_BATCH - 1))
         await _ensure_range(symbol, interval, window_start, now_ts)
-        latest = await run_in_threadpool(get_latest_open_time, symbol, interval)
+        latest = await _run_db(get_latest_open_time, symbol, interval)
         return latest
 
     if latest < now_ts:
         await _ensure_range(symbol, interval, latest + step, now_ts)
-        latest = await run_in_threadpool(get_latest_open_time, symbol, interval)
+        latest = await _run_db(get_latest_open_time, symbol, interval)
 
     return latest
 
@@ -354,7 +437,7 @@ async def fetch_candles(
     limit: Optional[int] = None,
 ) -> List[dict]:
     step = INTERVAL_SECONDS[interval]
-    now_ts = _align_timestamp(int(datetime.now(tz=UTC).timestamp()), step)
+    now_ts = _now_aligned(step)
     if end_ts is None or end_ts > now_ts:
         end_ts = now_ts
     else:
@@ -374,21 +457,25 @@ async def fetch_candles(
         start_ts = max(start_ts, end_ts - max_span)
 
     await _ensure_range(symbol, interval, start_ts, end_ts)
-    candles = await run_in_threadpool(
+    candles = await _run_db(
         storage_fetch_candles, symbol, interval, start_ts, end_ts, limit
     )
 
-    repaired = False
     invalid_times = _find_invalid_candle_times(candles, step)
-    while invalid_times and not repaired:
-        repaired = True
-        repair_start = _align_timestamp(min(invalid_times), step)
-        repair_end = _align_timestamp(max(invalid_times), step)
+    if invalid_times:
+        # Times come back in order. Only the repaired window can change, so refetch
+        # just that slice and splice it in rather than rereading the whole range.
+        repair_start = _align_timestamp(invalid_times[0], step)
+        repair_end = _align_timestamp(invalid_times[-1], step)
         await _ensure_range(symbol, interval, repair_start, repair_end)
-        candles = await run_in_threadpool(
-            storage_fetch_candles, symbol, interval, start_ts, end_ts, limit
+        window = await _run_db(
+            storage_fetch_candles, symbol, interval, repair_start, repair_end
         )
-        invalid_times = _find_invalid_candle_times(candles, step)
+        lo = _index_at_or_after(candles, repair_start)
+        hi = _index_at_or_after(candles, repair_end + 1)
+        candles[lo:hi] = window
+        if limit is not None:
+            del candles[limit:]
 
     return candles
 
@@ -397,9 +484,9 @@ async def available_time_range(symbol: str, interval: str) -> Tuple[datetime, da
     step = INTERVAL_SECONDS[interval]
     latest = await _ensure_latest(symbol, interval)
     if latest is None:
-        latest = _align_timestamp(int(datetime.now(tz=UTC).timestamp()), step)
+        latest = _now_aligned(step)
 
-    earliest, cached_latest = await run_in_threadpool(get_time_range, symbol, interval)
+    earliest, cached_latest = await _run_db(get_time_range, symbol, interval)
     if cached_latest is not None:
         latest = max(latest, cached_latest)
 
@@ -417,11 +504,11 @@ async def iter_future_candles(symbol: str, interval: str) -> AsyncGenerator[dict
     step = INTERVAL_SECONDS[interval]
     last_time = await _ensure_latest(symbol, interval)
     if last_time is None:
-        last_time = _align_timestamp(int(datetime.now(tz=UTC).timestamp()), step)
+        last_time = _now_aligned(step)
 
     last_final_time = last_time
 
-    pending = await run_in_threadpool(storage_fetch_after, symbol, interval, last_final_time)
+    pending = await _run_db(storage_fetch_after, symbol, interval, last_final_time)
     for candle in pending:
         ts = candle["time"]
         if ts <= last_final_time:
@@ -429,39 +516,36 @@ async def iter_future_candles(symbol: str, interval: str) -> AsyncGenerator[dict
         last_final_time = ts
         yield {"candle": candle, "final": True}
 
-    state, queue = await _subscribe_stream(symbol, interval)
-    try:
-        extra = await run_in_threadpool(storage_fetch_after, symbol, interval, last_final_time)
-        for candle in extra:
-            ts = candle["time"]
-            if ts <= last_final_time:
-                continue
-            last_final_time = ts
-            yield {"candle": candle, "final": True}
+    _, subscription = await _subscribe_stream(symbol, interval)
+    extra = await _run_db(storage_fetch_after, symbol, interval, last_final_time)
+    for candle in extra:
+        ts = candle["time"]
+        if ts <= last_final_time:
+            continue
+        last_final_time = ts
+        yield {"candle": candle, "final": True}
 
-        while True:
-            try:
-                payload = queue.get_nowait()
-            except QueueEmpty:
-                payload = await queue.get()
+    while True:
+        try:
+            payload = subscription.get_nowait()
+        except asyncio.QueueEmpty:
+            payload = await subscription.get()
 
-            candle = payload.get("candle")
-            if not candle:
-                continue
+        candle = payload.get("candle")
+        if not candle:
+            continue
 
-            final = bool(payload.get("final", True))
-            ts = candle.get("time")
-            if ts is None:
-                continue
+        final = bool(payload.get("final", True))
+        ts = candle.get("time")
+        if ts is None:
+            continue
 
-            if final:
-                if ts <= last_final_time:
-                    continue
-                last_final_time = ts
-            else:
-                if ts < last_final_time:
-                    continue
+        if final:
+            if ts <= last_final_time:
+                continue
+            last_final_time = ts
+        else:
+            if ts < last_final_time:
+                continue
 
-            yield {"candle": candle, "final": final}
-    finally:
-        await _unsubscribe_stream(state, queue)
\ No newline at end of file
+        yield {"candle": candle, "final": final}
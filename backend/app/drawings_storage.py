@@ -1,9 +1,13 @@
 """Storage for drawings."""
-import json
 import sqlite3
+import threading
 from typing import List, Optional
+from .json_codec import dumps as json_dumps, loads as json_loads
 from .models import Drawing
 
+_LOCAL = threading.local()
+_DRAWING_COLUMNS = "id, symbol, interval, tool, points, color, lineWidth, properties"
+
 
 def get_drawings_db_path() -> str:
     """Get the path to the drawings database."""
@@ -12,139 +16,131 @@ def get_drawings_db_path() -> str:
     return os.path.join(db_dir, "drawings.db")
 
 
+def _get_conn() -> sqlite3.Connection:
+    """Get this thread's cached connection, opening it on first use."""
+    db_path = get_drawings_db_path()
+    conns = getattr(_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOCAL.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conns[db_path] = conn
+    return conn
+
+
 def init_drawings_db() -> None:
     """Initialize the drawings database."""
-    db_path = get_drawings_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS drawings (
-            id TEXT PRIMARY KEY,
-            symbol TEXT NOT NULL,
-            interval TEXT,
-            tool TEXT NOT NULL,
-            points TEXT NOT NULL,
-            color TEXT,
-            lineWidth INTEGER,
-            properties TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    conn = _get_conn()
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS drawings (
+                id TEXT PRIMARY KEY,
+                symbol TEXT NOT NULL,
+                interval TEXT,
+                tool TEXT NOT NULL,
+                points TEXT NOT NULL,
+                color TEXT,
+                lineWidth INTEGER,
+                properties TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Best-effort add interval column for existing DBs
+        try:
+            conn.execute("ALTER TABLE drawings ADD COLUMN interval TEXT")
+        except sqlite3.OperationalError:
+            pass
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_drawings_symbol_interval ON drawings(symbol, interval)"
         )
-    """)
-    # Best-effort add interval column for existing DBs
-    try:
-        cursor.execute("ALTER TABLE drawings ADD COLUMN interval TEXT")
-    except sqlite3.OperationalError:
-        pass
-    
-    conn.commit()
-    conn.close()
 
 
 def save_drawing(drawing: Drawing) -> None:
     """Save a drawing to the database."""
-    db_path = get_drawings_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT OR REPLACE INTO drawings 
-        (id, symbol, interval, tool, points, color, lineWidth, properties)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        drawing.id,
-        drawing.symbol,
-        getattr(drawing, 'interval', None),
-        drawing.tool,
-        json.dumps(drawing.points),
-        drawing.color,
-        drawing.lineWidth,
-        json.dumps(drawing.properties) if drawing.properties else None,
-    ))
-    
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO drawings
+            (id, symbol, interval, tool, points, color, lineWidth, properties)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            drawing.id,
+            drawing.symbol,
+            drawing.interval,
+            drawing.tool,
+            json_dumps(drawing.points),
+            drawing.color,
+            drawing.lineWidth,
+            json_dumps(drawing.properties) if drawing.properties else None,
+        ))
 
 
 def get_drawings(symbol: str, interval: Optional[str] = None) -> List[Drawing]:
     """Get drawings for a symbol, optionally filtered by interval."""
-    db_path = get_drawings_db_path()
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
+    conn = _get_conn()
+
     if interval:
-        cursor.execute(
-            """
-            SELECT * FROM drawings 
+        rows = conn.execute(
+            f"""
+            SELECT {_DRAWING_COLUMNS} FROM drawings
             WHERE symbol = ? AND (interval = ? OR interval IS NULL OR interval = '')
             ORDER BY created_at ASC
             """,
             (symbol, interval),
-        )
+        ).fetchall()
     else:
-        cursor.execute(
-            """
-            SELECT * FROM drawings 
+        rows = conn.execute(
+            f"""
+            SELECT {_DRAWING_COLUMNS} FROM drawings
             WHERE symbol = ?
             ORDER BY created_at ASC
             """,
             (symbol,),
+        ).fetchall()
+
+    # Rows are plain tuples in _DRAWING_COLUMNS order.
+    return [
+        Drawing(
+            id=drawing_id,
+            symbol=row_symbol,
+            interval=row_interval or "",
+            tool=tool,
+            points=json_loads(points),
+            color=color,
+            lineWidth=line_width,
+            properties=json_loads(properties) if properties else None,
         )
-    
-    rows = cursor.fetchall()
-    conn.close()
-    
-    drawings: List[Drawing] = []
-    for row in rows:
-        drawing = Drawing(
-            id=row["id"],
-            symbol=row["symbol"],
-            interval=row["interval"] or "",
-            tool=row["tool"],
-            points=json.loads(row["points"]),
-            color=row["color"],
-            lineWidth=row["lineWidth"],
-            properties=json.loads(row["properties"]) if row["properties"] else None,
-        )
-        drawings.append(drawing)
-    
-    return drawings
+        for drawing_id, row_symbol, row_interval, tool, points, color, line_width, properties in rows
+    ]
 
 
 def delete_drawing(drawing_id: str) -> bool:
     """Delete a drawing by ID."""
-    db_path = get_drawings_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("DELETE FROM drawings WHERE id = ?", (drawing_id,))
-    conn.commit()
-    affected = cursor.rowcount
-    conn.close()
-    
-    return affected > 0
+    conn = _get_conn()
+    with conn:
+        cursor = conn.execute("DELETE FROM drawings WHERE id = ?", (drawing_id,))
+
+    return cursor.rowcount > 0
 
 
 def delete_all_drawings(symbol: str, interval: Optional[str] = None) -> int:
     """Delete drawings for a symbol, optionally filtered by interval."""
-    db_path = get_drawings_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    if interval:
-        cursor.execute(
-            "DELETE FROM drawings WHERE symbol = ? AND (interval = ? OR interval IS NULL OR interval = '')",
-            (symbol, interval),
-        )
-    else:
-        cursor.execute(
-            "DELETE FROM drawings WHERE symbol = ?",
-            (symbol,),
-        )
-    conn.commit()
-    affected = cursor.rowcount
-    conn.close()
-    
-    return affected
+    conn = _get_conn()
+    with conn:
+        if interval:
+            cursor = conn.execute(
+                "DELETE FROM drawings WHERE symbol = ? AND (interval = ? OR interval IS NULL OR interval = '')",
+                (symbol, interval),
+            )
+        else:
+            cursor = conn.execute(
+                "DELETE FROM drawings WHERE symbol = ?",
+                (symbol,),
+            )
+
+    return cursor.rowcount
@@ -1,9 +1,13 @@
 """Simple async events bus for trading updates."""
 import asyncio
+import threading
 from typing import Dict, List, Any, Optional
 
+from .json_codec import dumps as json_dumps
+
 _SUBSCRIBERS: Dict[int, List[asyncio.Queue]] = {}
-_LOCK = asyncio.Lock()
+# Guarded sections never await, so a plain lock works from the loop and from threads.
+_LOCK = threading.Lock()
 _EVENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
 
 
@@ -13,19 +17,19 @@ def set_event_loop(loop: asyncio.AbstractEventLoop) -> None:
 
 async def subscribe(account_id: int) -> asyncio.Queue:
     queue: asyncio.Queue = asyncio.Queue(maxsize=256)
-    async with _LOCK:
+    with _LOCK:
         _SUBSCRIBERS.setdefault(account_id, []).append(queue)
     return queue
 
 async def unsubscribe(account_id: int, queue: asyncio.Queue) -> None:
-    async with _LOCK:
+    with _LOCK:
         lst = _SUBSCRIBERS.get(account_id, [])
         if queue in lst:
             lst.remove(queue)
         if not lst and account_id in _SUBSCRIBERS:
             _SUBSCRIBERS.pop(account_id, None)
 
-def _safe_put(queue: asyncio.Queue, payload: Dict[str, Any]) -> None:
+def _safe_put(queue: asyncio.Queue, payload: str) -> None:
     try:
         queue.put_nowait(payload)
     except asyncio.QueueFull:
@@ -38,22 +42,27 @@ def _safe_put(queue: asyncio.Queue, payload: Dict[str, Any]) -> None:
         except Exception:
             pass
 
-async def notify(account_id: int, payload: Dict[str, Any]) -> None:
-    async with _LOCK:
+def notify(account_id: int, payload: Dict[str, Any]) -> None:
+    """Deliver payload to the account's subscribers; must run on the loop thread.
+
+    The payload is JSON-encoded once here and subscribers receive the text.
+    """
+    with _LOCK:
         targets = list(_SUBSCRIBERS.get(account_id, []))
     if not targets:
         return
+    message = json_dumps(payload)
     for q in targets:
-        _safe_put(q, payload)
+        _safe_put(q, message)
 
 
 def dispatch(account_id: int, payload: Dict[str, Any]) -> None:
     """Schedule an event notification in a thread-safe manner."""
     try:
-        loop = asyncio.get_running_loop()
+        asyncio.get_running_loop()
     except RuntimeError:
         if _EVENT_LOOP is None:
             raise RuntimeError("Events bus loop not registered")
-        asyncio.run_coroutine_threadsafe(notify(account_id, payload), _EVENT_LOOP)
+        _EVENT_LOOP.call_soon_threadsafe(notify, account_id, payload)
     else:
-        loop.create_task(notify(account_id, payload))
+        notify(account_id, payload)
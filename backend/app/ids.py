@@ -0,0 +1,18 @@
+"""Identifier helpers for stored records."""
+import secrets
+import time
+from itertools import count
+
+# Per-process sequence for the id suffix. Seeded randomly so processes sharing the
+# database (or a restart within the same nanosecond tick) still get distinct ids,
+# without reading OS randomness for every id.
+_SEQUENCE = count(secrets.randbits(32))
+
+
+def new_id() -> str:
+    """Return a 24-char hex id: nanosecond timestamp prefix plus a 4-byte sequence.
+
+    Ids sort by creation time, so TEXT primary keys are appended in order
+    instead of scattering inserts across the SQLite B-tree like uuid4 does.
+    """
+    return f"{time.time_ns():016x}{next(_SEQUENCE) & 0xFFFFFFFF:08x}"
@@ -0,0 +1,38 @@
+"""JSON encode/decode helpers backed by orjson when it is installed."""
+from typing import Any, Union
+
+try:
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - fallback for minimal installs
+    _orjson = None
+    import json as _json
+
+JSONDecodeError = ValueError
+
+
+if _orjson is not None:
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        return _orjson.loads(data)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return _orjson.dumps(obj)
+
+else:
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return _json.loads(data)
+
+    # json.dumps builds a fresh JSONEncoder whenever non-default options are
+    # passed; keep one configured instance around instead.
+    _ENCODER = _json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return _ENCODER.encode(obj).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize ``obj`` to a compact JSON string."""
+    return dumps_bytes(obj).decode("utf-8")
@@ -1,13 +1,21 @@
 import asyncio
+from bisect import bisect_left
+from collections import deque
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional, Literal
+from typing import Any, Callable, Deque, Dict, List, Optional, Literal, Set, Tuple
 
 from calendar import monthrange
 
-from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import logging
-from pydantic import BaseModel, Field, model_validator
+import sys
+import time
+from operator import attrgetter
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, model_validator
 
 from .config import INTERVAL_MINUTES
 from .data_provider import (
@@ -16,7 +24,7 @@ from .data_provider import (
     iter_future_candles,
     list_instruments,
 )
-from .schemas import Candle, CandleResponse, InstrumentResponse, TimeRangeResponse
+from .schemas import CandleResponse, InstrumentResponse, TimeRangeResponse
 from .models import Drawing
 from .drawings_storage import (
     init_drawings_db,
@@ -30,50 +38,91 @@ from .trading_storage import (
     get_or_create_account,
     get_account_stats,
     get_account_id,
-    save_account,
-    clear_orders,
-    clear_trades,
-    reset_account_stats,
+    get_account_version,
+    reset_account_data,
+    evict_account,
+    peek_account,
 )
-from .trading_engine import get_trading_engine
+from .trading_engine import discard_trading_engine, get_trading_engine
+from .trading_models import CLOSED_POSITION_TIME
 from .events_bus import (
     subscribe as events_subscribe,
     unsubscribe as events_unsubscribe,
     set_event_loop as events_set_event_loop,
 )
-from .storage import get_latest_price
+from .storage import ensure_initialized as init_candles_db, get_latest_price
+from .binance_client import aclose_client as binance_aclose_client
+from .ids import new_id
+from .json_codec import dumps as json_dumps, dumps_bytes as json_dumps_bytes
 
-app = FastAPI(title="TradingView Clone API", version="0.1.0")
-logger = logging.getLogger("ws")
 
-# Initialize databases
-init_drawings_db()
-init_trading_db()
+class _CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered through json_codec (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps_bytes(content)
+
+
+app = FastAPI(title="TradingView Clone API", version="0.1.0", default_response_class=_CodecJSONResponse)
+logger = logging.getLogger("ws")
 
 app.add_middleware(
     CORSMiddleware,
+    # No cookies/auth headers cross origins, so "*" can stay a static header
+    # instead of being echoed back per request as credentials would require.
     allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"]
-    ,
+    allow_credentials=False,
+    allow_methods=["*"],
     allow_headers=["*"],
 )
 
 
 @app.on_event("startup")
 async def _register_events_loop() -> None:
-    events_set_event_loop(asyncio.get_running_loop())
+    loop = asyncio.get_running_loop()
+    # Surfaces a deployment that silently fell back to the stdlib loop (no uvloop).
+    logger.info("Event loop: %s.%s", type(loop).__module__, type(loop).__qualname__)
+    events_set_event_loop(loop)
+
+
+@app.on_event("startup")
+async def _init_databases() -> None:
+    # Schema setup is blocking sqlite I/O; keep it off the loop and run them at once.
+    await asyncio.gather(
+        asyncio.to_thread(init_drawings_db),
+        asyncio.to_thread(init_trading_db),
+        asyncio.to_thread(init_candles_db),
+    )
+
+
+@app.on_event("shutdown")
+async def _close_binance_client() -> None:
+    await binance_aclose_client()
+
+
+# Liveness probes only need a 200; serve the same bytes every time.
+_HEALTH_BODY = json_dumps_bytes({"status": "ok"})
 
 
 @app.get("/health")
-def health() -> dict:
-    return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
+async def health() -> Response:
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+
+# Instruments are static config; encode the list once instead of validating models per request.
+_INSTRUMENTS_BODY = json_dumps_bytes(
+    [{"symbol": i.symbol, "name": i.name} for i in list_instruments()]
+)
 
 
 @app.get("/api/instruments", response_model=List[InstrumentResponse])
-def get_instruments() -> List[InstrumentResponse]:
-    instruments = list_instruments()
-    return [InstrumentResponse(symbol=i.symbol, name=i.name) for i in instruments]
+async def get_instruments() -> Response:
+    return Response(content=_INSTRUMENTS_BODY, media_type="application/json")
+
+
+def _iso_utc(ts: int) -> str:
+    # Candle times are whole seconds; same text as datetime.isoformat() with "Z".
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
 
 
 @app.get("/api/candles", response_model=CandleResponse)
@@ -83,10 +132,8 @@ async def get_candles(
     start: Optional[int] = Query(None, description="Start timestamp in seconds"),
     end: Optional[int] = Query(None, description="End timestamp in seconds"),
     limit: Optional[int] = Query(500, ge=1, le=5000, description="Maximum number of candles"),
-) -> CandleResponse:
-    interval = interval.lower()
-    if interval not in INTERVAL_MINUTES:
-        raise HTTPException(status_code=400, detail=f"Unsupported interval: {interval}")
+) -> Response:
+    interval = _normalize_interval(interval)
 
     candles_raw = await fetch_candles(
         symbol=symbol,
@@ -98,11 +145,14 @@ async def get_candles(
     if not candles_raw:
         raise HTTPException(status_code=404, detail="No candles found")
 
-    candles = [Candle(**candle) for candle in candles_raw]
-    start_time = datetime.fromtimestamp(candles_raw[0]["time"], tz=timezone.utc)
-    end_time = datetime.fromtimestamp(candles_raw[-1]["time"], tz=timezone.utc)
-
-    return CandleResponse(candles=candles, start=start_time, end=end_time)
+    # Rows come from storage already typed, so skip per-candle model validation and
+    # encode the response body directly; response_model still documents the shape.
+    body = {
+        "candles": candles_raw,
+        "start": _iso_utc(candles_raw[0]["time"]),
+        "end": _iso_utc(candles_raw[-1]["time"]),
+    }
+    return Response(content=json_dumps_bytes(body), media_type="application/json")
 
 
 @app.get("/api/candles/range", response_model=TimeRangeResponse)
@@ -110,41 +160,76 @@ async def get_candles_range(
     symbol: str = Query(..., min_length=1),
     interval: str = Query(..., description="Candle interval e.g. 1m"),
 ) -> TimeRangeResponse:
-    interval = interval.lower()
-    if interval not in INTERVAL_MINUTES:
-        raise HTTPException(status_code=400, detail=f"Unsupported interval: {interval}")
+    interval = _normalize_interval(interval)
 
     earliest, latest = await available_time_range(symbol, interval)
     return TimeRangeResponse(earliest=earliest, latest=latest)
 
 
+def _canonical_map(values) -> Dict[str, str]:
+    """Map each valid value to its interned canonical string."""
+    return {sys.intern(value): sys.intern(value) for value in values}
+
+
+# Instruments are static config, so build the lookup once. The normalizers below
+# return the interned canonical object, so downstream dict/cache-key lookups on it
+# hit the identity fast path instead of comparing fresh request strings.
+_SYMBOLS = _canonical_map(instrument.symbol.upper() for instrument in list_instruments())
+
+
 def _validate_symbol(symbol: str) -> str:
-    uppercase = symbol.upper()
-    symbols = {instrument.symbol for instrument in list_instruments()}
-    if uppercase not in symbols:
-        raise HTTPException(status_code=400, detail=f"Unsupported symbol: {symbol}")
-    return uppercase
+    # Clients normally send canonical values, so check before allocating a new string.
+    canonical = _SYMBOLS.get(symbol)
+    if canonical is None:
+        canonical = _SYMBOLS.get(symbol.upper())
+        if canonical is None:
+            raise HTTPException(status_code=400, detail=f"Unsupported symbol: {symbol}")
+    return canonical
 
 
 DEFAULT_MODE = "realtime"
-VALID_MODES = {"realtime", "playback"}
+VALID_MODES = frozenset({"realtime", "playback"})
 DEFAULT_INTERVAL = "1m"
 DEFAULT_LIST_LIMIT = 50
 MAX_LIST_LIMIT = 500
+_MODES = _canonical_map(VALID_MODES)
+_INTERVALS = _canonical_map(INTERVAL_MINUTES)
 
 
 def _normalize_mode(mode: Optional[str]) -> str:
-    value = (mode or DEFAULT_MODE).lower()
-    if value not in VALID_MODES:
-        raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode}")
-    return value
+    value = mode or DEFAULT_MODE
+    canonical = _MODES.get(value)
+    if canonical is None:
+        canonical = _MODES.get(value.lower())
+        if canonical is None:
+            raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode}")
+    return canonical
 
 
 def _normalize_interval(interval: Optional[str]) -> str:
-    value = (interval or DEFAULT_INTERVAL).lower()
-    if value not in INTERVAL_MINUTES:
-        raise HTTPException(status_code=400, detail=f"Unsupported interval: {value}")
-    return value
+    value = interval or DEFAULT_INTERVAL
+    canonical = _INTERVALS.get(value)
+    if canonical is None:
+        value = value.lower()
+        canonical = _INTERVALS.get(value)
+        if canonical is None:
+            raise HTTPException(status_code=400, detail=f"Unsupported interval: {value}")
+    return canonical
+
+
+async def _parse_body(request: Request, validate_json: Callable[[bytes], Any]) -> Any:
+    """Validate the raw request body in one pass (no intermediate dict)."""
+    try:
+        return validate_json(await request.body())
+    except ValidationError as exc:
+        # Same shape as FastAPI's own body errors: "body"-prefixed loc, no docs url.
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)]
+        raise RequestValidationError(errors) from exc
+
+
+def _json_body(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """openapi_extra for endpoints that read their body via _parse_body."""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
 
 
 def _normalize_limit(limit: Optional[int], default: int = DEFAULT_LIST_LIMIT) -> int:
@@ -155,43 +240,101 @@ def _normalize_limit(limit: Optional[int], default: int = DEFAULT_LIST_LIMIT) ->
     return limit
 
 
-def _paginate_items(items, sort_key, limit: int):
-    ordered = sorted(items, key=sort_key, reverse=True)
-    total = len(ordered)
-    if limit is not None:
-        ordered = ordered[:limit]
-    return ordered, total
+def _paginate_items(items, limit: Optional[int], offset: int = 0):
+    """Newest-first page of an oldest-first list (see Account.add_order)."""
+    total = len(items)
+    end = total - offset
+    if end <= 0:
+        return [], total
+    start = 0 if limit is None else max(end - limit, 0)
+    return items[start:end][::-1], total
+
+
+def _normalize_account_params(
+    symbol: str, mode: Optional[str], interval: Optional[str]
+) -> Tuple[str, str, str]:
+    """Validate once per request; helpers below take the canonical values."""
+    return _validate_symbol(symbol), _normalize_mode(mode), _normalize_interval(interval)
 
 
 def _resolve_account(symbol: str, mode: Optional[str], interval: Optional[str]):
-    uppercase_symbol = _validate_symbol(symbol)
-    normalized_mode = _normalize_mode(mode)
-    interval_value = _normalize_interval(interval)
+    uppercase_symbol, normalized_mode, interval_value = _normalize_account_params(symbol, mode, interval)
     account_id, account = get_or_create_account(normalized_mode, uppercase_symbol, interval_value)
     return account_id, account, normalized_mode, interval_value, uppercase_symbol
 
 
-def _account_payload(
+def _resolve_engine(symbol: str, mode: Optional[str], interval: Optional[str]):
+    account_id, account, normalized_mode, interval_value, uppercase_symbol = _resolve_account(symbol, mode, interval)
+    return get_trading_engine(account_id, account), normalized_mode, interval_value, uppercase_symbol
+
+
+# GET projections keyed by endpoint and params -> (account_id, version, body). The
+# stored version changes on every account write, which invalidates the entry.
+_RESPONSE_CACHE: Dict[tuple, Tuple[int, int, bytes]] = {}
+_RESPONSE_CACHE_MAX = 256
+
+
+def _cached_account_body(
+    endpoint: str,
+    uppercase_symbol: str,
+    normalized_mode: str,
+    interval_value: str,
+    params: tuple,
+    build: Callable[[int, Any], Any],
+) -> bytes:
+    cache_key = (endpoint, normalized_mode, uppercase_symbol, interval_value, params)
+
+    cached = _RESPONSE_CACHE.get(cache_key)
+    version = get_account_version(cached[0]) if cached is not None else None
+    if cached is not None and cached[1] == version:
+        return cached[2]
+
+    account_id, account = get_or_create_account(normalized_mode, uppercase_symbol, interval_value)
+    if version is None:
+        version = get_account_version(account_id)
+    body = json_dumps_bytes(build(account_id, account))
+    if len(_RESPONSE_CACHE) >= _RESPONSE_CACHE_MAX:
+        _RESPONSE_CACHE.clear()
+    _RESPONSE_CACHE[cache_key] = (account_id, version, body)
+    return body
+
+
+def _cached_account_response(
+    endpoint: str,
     symbol: str,
     mode: Optional[str],
     interval: Optional[str],
-    orders_limit: Optional[int] = None,
-    trades_limit: Optional[int] = None,
-    closed_positions_limit: Optional[int] = None,
-) -> Dict[str, Any]:
-    orders_limit_value = _normalize_limit(orders_limit)
-    trades_limit_value = _normalize_limit(trades_limit)
-    closed_limit_value = _normalize_limit(closed_positions_limit)
-
-    account_id, account, _, _, _ = _resolve_account(symbol, mode, interval)
-    stats = get_account_stats(account_id)
-    return _serialize_account(
-        account,
-        stats,
-        account_id,
-        orders_limit=orders_limit_value,
-        trades_limit=trades_limit_value,
-        closed_positions_limit=closed_limit_value,
+    params: tuple,
+    build: Callable[[int, Any], Any],
+) -> Response:
+    body = _cached_account_body(endpoint, *_normalize_account_params(symbol, mode, interval), params, build)
+    return Response(content=body, media_type="application/json")
+
+
+def _account_snapshot_body(
+    uppercase_symbol: str,
+    normalized_mode: str,
+    interval_value: str,
+    orders_limit: int,
+    trades_limit: int,
+    closed_positions_limit: int,
+) -> bytes:
+    """Encoded account snapshot shared by /api/account and the /ws/account greeting."""
+    return _cached_account_body(
+        "account",
+        uppercase_symbol,
+        normalized_mode,
+        interval_value,
+        (orders_limit, trades_limit, closed_positions_limit),
+        lambda account_id, account: _serialize_account(
+            account,
+            get_account_stats(account_id),
+            account_id,
+            orders_limit=orders_limit,
+            trades_limit=trades_limit,
+            closed_positions_limit=closed_positions_limit,
+            interval=interval_value,
+        ),
     )
 
 
@@ -199,22 +342,47 @@ def _reset_account_state(symbol: str, mode: Optional[str], interval: Optional[st
     account_id, account, normalized_mode, interval_value, uppercase_symbol = _resolve_account(symbol, mode, interval)
 
     initial_balance = account.initial_balance
-    account.balance = initial_balance
-    account.positions = []
-    account.orders = []
-    account.trades = []
-    account.closed_positions = []
-
-    clear_orders(account_id)
-    clear_trades(account_id)
-    reset_account_stats(account_id)
-
-    save_account(account_id, account)
+    # 与引擎入口互斥：正在进行的成交/止盈止损写完后再清空，之后拿到的是新加载的账户
+    with account.lock:
+        account.balance = initial_balance
+        account.clear_positions()
+        account.clear_orders()
+        account.trades.clear()
+        account.closed_positions.clear()
+
+        reset_account_data(account_id, initial_balance)
+        evict_account(normalized_mode, uppercase_symbol)
+        discard_trading_engine(account_id)
 
     logger.info(f"[ResetAccount] Account reset: {normalized_mode}/{uppercase_symbol}/{interval_value}")
     return {"success": True, "balance": account.balance}
 
 
+# Position projection. attrgetter pulls every field in one C call and zip/dict
+# builds the payload without per-key bytecode. Orders, trades and closed positions
+# cache their own payloads (see trading_models.to_dict).
+_POSITION_FIELDS = ("symbol", "quantity", "entry_price", "entry_time", "take_profit_price", "stop_loss_price")
+_position_values = attrgetter(*_POSITION_FIELDS)
+_STATS_FIELDS = (
+    "total_trades", "winning_trades", "losing_trades", "win_rate",
+    "total_profit", "total_loss", "profit_factor", "expectancy",
+    "max_drawdown", "max_drawdown_pct", "sharpe_ratio", "cagr",
+    "cumulative_return", "total_return",
+)
+_stats_values = attrgetter(*_STATS_FIELDS)
+# The account snapshot carries a subset of the stats.
+_SNAPSHOT_STATS_FIELDS = (
+    "total_trades", "winning_trades", "losing_trades", "win_rate",
+    "profit_factor", "max_drawdown", "max_drawdown_pct", "sharpe_ratio",
+    "cagr", "cumulative_return", "total_return",
+)
+_snapshot_stats_values = attrgetter(*_SNAPSHOT_STATS_FIELDS)
+
+
+def _position_dict(p) -> Dict[str, Any]:
+    return dict(zip(_POSITION_FIELDS, _position_values(p)))
+
+
 def _serialize_account(
     account,
     stats: Optional[Any] = None,
@@ -223,103 +391,32 @@ def _serialize_account(
     orders_limit: int = DEFAULT_LIST_LIMIT,
     trades_limit: int = DEFAULT_LIST_LIMIT,
     closed_positions_limit: int = DEFAULT_LIST_LIMIT,
+    interval: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Convert account dataclass into a serializable structure."""
-    positions_payload = []
-    total_position_value = 0.0
-    for p in account.positions:
-        positions_payload.append(
-            {
-                "symbol": p.symbol,
-                "quantity": p.quantity,
-                "entry_price": p.entry_price,
-                "entry_time": p.entry_time,
-                "take_profit_price": p.take_profit_price,
-                "stop_loss_price": p.stop_loss_price,
-            }
-        )
-        total_position_value += abs(p.quantity) * p.entry_price
+    positions = account.positions
+    if positions:
+        positions_payload = [_position_dict(p) for p in positions]
+        total_position_value = sum(abs(p.quantity) * p.entry_price for p in positions)
+    else:
+        positions_payload = []
+        total_position_value = 0.0
 
-    orders_sorted, orders_total = _paginate_items(
-        account.orders,
-        sort_key=lambda o: getattr(o, "create_time", 0),
-        limit=orders_limit,
-    )
+    orders_sorted, orders_total = _paginate_items(account.orders, orders_limit)
 
-    orders_payload = [
-        {
-            "id": o.id,
-            "symbol": o.symbol,
-            "direction": o.direction,
-            "type": o.type,
-            "quantity": o.quantity,
-            "price": o.price,
-            "create_time": o.create_time,
-            "filled_quantity": o.filled_quantity,
-            "filled_price": o.filled_price,
-            "status": o.status,
-        }
-        for o in orders_sorted
-    ]
+    orders_payload = [o.to_dict() for o in orders_sorted]
 
-    trades_sorted, trades_total = _paginate_items(
-        account.trades,
-        sort_key=lambda t: getattr(t, "timestamp", 0),
-        limit=trades_limit,
-    )
+    trades_sorted, trades_total = _paginate_items(account.trades, trades_limit)
 
-    trades_payload = [
-        {
-            "id": t.id,
-            "symbol": t.symbol,
-            "direction": t.direction,
-            "quantity": t.quantity,
-            "price": t.price,
-            "timestamp": t.timestamp,
-            "commission": t.commission,
-        }
-        for t in trades_sorted
-    ]
+    trades_payload = [t.to_dict() for t in trades_sorted]
 
-    closed_sorted, closed_total = _paginate_items(
-        account.closed_positions,
-        sort_key=lambda cp: getattr(cp, "exit_time", 0),
-        limit=closed_positions_limit,
-    )
+    closed_sorted, closed_total = _paginate_items(account.closed_positions, closed_positions_limit)
 
-    closed_positions_payload = [
-        {
-            "id": cp.id,
-            "symbol": cp.symbol,
-            "direction": cp.direction,
-            "quantity": cp.quantity,
-            "entry_price": cp.entry_price,
-            "entry_time": cp.entry_time,
-            "exit_price": cp.exit_price,
-            "exit_time": cp.exit_time,
-            "profit_loss": cp.profit_loss,
-            "commission": cp.commission,
-            "days_held": cp.days_held(),
-            "return_pct": cp.return_pct(),
-        }
-        for cp in closed_sorted
-    ]
+    closed_positions_payload = [cp.to_dict() for cp in closed_sorted]
 
-    stats_payload: Dict[str, Any] = {}
-    if stats:
-        stats_payload = {
-            "total_trades": stats.total_trades,
-            "winning_trades": stats.winning_trades,
-            "losing_trades": stats.losing_trades,
-            "win_rate": stats.win_rate,
-            "profit_factor": stats.profit_factor,
-            "max_drawdown": stats.max_drawdown,
-            "max_drawdown_pct": stats.max_drawdown_pct,
-            "sharpe_ratio": stats.sharpe_ratio,
-            "cagr": stats.cagr,
-            "cumulative_return": stats.cumulative_return,
-            "total_return": stats.total_return,
-        }
+    stats_payload: Dict[str, Any] = (
+        dict(zip(_SNAPSHOT_STATS_FIELDS, _snapshot_stats_values(stats))) if stats else {}
+    )
 
     # Unrealized PnL is not tracked server-side without market data; keep zero for now.
     unrealized_pnl = 0.0
@@ -329,7 +426,8 @@ def _serialize_account(
         "account_id": account_id,
         "mode": account.mode,
         "symbol": account.symbol,
-        "interval": account.interval,
+        # The account object is shared across intervals; report the caller's.
+        "interval": interval or account.interval,
         "initial_balance": account.initial_balance,
         "balance": account.balance,
         "positions": positions_payload,
@@ -349,17 +447,20 @@ def _serialize_account(
     }
 
 
-@app.post("/api/drawings")
-def create_drawing(drawing: Drawing) -> Drawing:
+_DRAWING_ADAPTER = TypeAdapter(Drawing)
+
+
+@app.post("/api/drawings", openapi_extra=_json_body(_DRAWING_ADAPTER.json_schema()))
+async def create_drawing(request: Request) -> Drawing:
     """Save a new drawing."""
+    drawing: Drawing = await _parse_body(request, _DRAWING_ADAPTER.validate_json)
     if not drawing.id:
-        import uuid
-        drawing.id = str(uuid.uuid4())
+        drawing.id = new_id()
     
     uppercase_symbol = _validate_symbol(drawing.symbol)
     drawing.symbol = uppercase_symbol
     
-    save_drawing(drawing)
+    await run_in_threadpool(save_drawing, drawing)
     return drawing
 
 
@@ -410,25 +511,154 @@ def _check_and_trigger_tpsl(mode: str, symbol: str, interval: str, candle: dict)
     """检查并触发止盈止损和限价单"""
     try:
         account_id, account = get_or_create_account(mode, symbol, interval)
-        engine = get_trading_engine(account_id, account)
-        
         current_price = candle["close"]
         high = candle.get("high")
         low = candle.get("low")
         
-        # 检查限价单（使用K线高低价）
-        filled_orders = engine.try_fill_limit_orders(symbol, current_price, high, low)
-        if filled_orders:
-            logger.info(f"[LimitOrder] Filled {len(filled_orders)} orders for {symbol}")
-        
-        # 检查止盈止损（使用K线高低价）
-        triggered_orders = engine.check_tpsl_triggers(symbol, current_price, high, low)
+        # 在线程池中运行：持有账户锁，与下单/撤单/设置止盈止损/重置串行
+        with account.lock:
+            if not account.has_pending_triggers(symbol):
+                return
+            engine = get_trading_engine(account_id, account)
+            
+            # 同一根K线上的限价成交和止盈止损合并写库
+            with engine.batch():
+                # 检查限价单（使用K线高低价）
+                filled_orders = engine.try_fill_limit_orders(symbol, current_price, high, low)
+                if filled_orders:
+                    logger.info(f"[LimitOrder] Filled {len(filled_orders)} orders for {symbol}")
+                
+                # 检查止盈止损（使用K线高低价）
+                triggered_orders = engine.check_tpsl_triggers(symbol, current_price, high, low)
         if triggered_orders:
             logger.info(f"[TPSL] Triggered {len(triggered_orders)} orders for {symbol} @ {current_price}")
     except Exception as e:
         logger.error(f"[TPSL] Error checking TP/SL: {e}")
 
 
+# How long the candle stream waits to coalesce a burst of updates into one frame.
+WS_BATCH_WINDOW = 0.02
+# Pending TP/SL checks per candle channel before the oldest is dropped.
+TPSL_QUEUE_SIZE = 64
+# Encoded updates buffered per /ws/candles client; see _UpdateBuffer.
+WS_CLIENT_QUEUE_SIZE = 64
+
+
+def _put_drop_oldest(queue: asyncio.Queue, item: Any) -> None:
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
+class _UpdateBuffer:
+    """Bounded per-client buffer of (time, final, text) updates. On overflow the
+    oldest in-flight (non-final) tick is dropped first, so a slow client still
+    receives every closed candle."""
+
+    __slots__ = ("_items", "_maxsize", "_ready")
+
+    def __init__(self, maxsize: int) -> None:
+        self._items: Deque[Any] = deque()
+        self._maxsize = maxsize
+        self._ready = asyncio.Event()
+
+    def put(self, item: Any) -> None:
+        items = self._items
+        if len(items) >= self._maxsize:
+            for index, queued in enumerate(items):
+                if queued is not None and not queued[1]:
+                    del items[index]
+                    break
+            else:
+                items.popleft()
+        items.append(item)
+        self._ready.set()
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def get_nowait(self) -> Any:
+        return self._items.popleft()
+
+    async def get(self) -> Any:
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._items.popleft()
+
+
+class _CandleChannel:
+    """Single iter_future_candles consumer per (symbol, interval), shared by every
+    /ws/candles client: each update is encoded and TP/SL-checked once, then the
+    encoded text is fanned out to the client queues."""
+
+    def __init__(self, symbol: str, interval: str) -> None:
+        self.symbol = symbol
+        self.interval = interval
+        self.clients: Set[_UpdateBuffer] = set()
+        self.task: Optional[asyncio.Task] = None
+        # The envelope around each candle is fixed per channel; encode it once.
+        self._prefix = (
+            '{"type":"update","symbol":' + json_dumps(symbol)
+            + ',"interval":' + json_dumps(interval) + ',"candle":'
+        )
+
+    def subscribe(self) -> _UpdateBuffer:
+        queue = _UpdateBuffer(WS_CLIENT_QUEUE_SIZE)
+        self.clients.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: _UpdateBuffer) -> None:
+        self.clients.discard(queue)
+        if not self.clients and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self) -> None:
+        symbol, interval, prefix = self.symbol, self.interval, self._prefix
+        tpsl_queue: asyncio.Queue = asyncio.Queue(maxsize=TPSL_QUEUE_SIZE)
+
+        async def tpsl_worker() -> None:
+            while True:
+                candle = await tpsl_queue.get()
+                await run_in_threadpool(_check_and_trigger_tpsl, "realtime", symbol, interval, candle)
+
+        tpsl_task = asyncio.create_task(tpsl_worker())
+        try:
+            async for update in iter_future_candles(symbol, interval):
+                candle = update["candle"]
+                final = update.get("final", True)
+                text = prefix + json_dumps(candle) + (',"final":true}' if final else ',"final":false}')
+                item = (candle["time"], final, text)
+                for queue in tuple(self.clients):
+                    queue.put(item)
+                # 实时检查止盈止损和限价单（每次更新都检查，包括未完成的K线）; handled by
+                # tpsl_worker so DB work never delays the fanout. Idle accounts
+                # (already cached, nothing to trigger) skip the thread hop.
+                cached = peek_account("realtime", symbol)
+                if cached is None or cached[1].has_pending_triggers(symbol):
+                    _put_drop_oldest(tpsl_queue, candle)
+        except Exception:
+            logger.exception("Candle channel failed for %s %s", symbol, interval)
+            # None tells each client the stream is gone.
+            for queue in tuple(self.clients):
+                queue.put(None)
+        finally:
+            tpsl_task.cancel()
+
+
+_CANDLE_CHANNELS: Dict[Tuple[str, str], _CandleChannel] = {}
+
+
+def _candle_channel(symbol: str, interval: str) -> _CandleChannel:
+    channel = _CANDLE_CHANNELS.get((symbol, interval))
+    if channel is None:
+        channel = _CANDLE_CHANNELS[(symbol, interval)] = _CandleChannel(symbol, interval)
+    return channel
+
+
 @app.websocket("/ws/candles")
 async def stream_candles(websocket: WebSocket, symbol: str, interval: str) -> None:
     try:
@@ -437,31 +667,50 @@ async def stream_candles(websocket: WebSocket, symbol: str, interval: str) -> No
         await websocket.close(code=4400, reason=exc.detail)
         return
 
-    interval = interval.lower()
-    if interval not in INTERVAL_MINUTES:
+    canonical_interval = _INTERVALS.get(interval) or _INTERVALS.get(interval.lower())
+    if canonical_interval is None:
         await websocket.close(code=4400, reason="Unsupported interval")
         return
+    interval = canonical_interval
 
     await websocket.accept()
 
+    channel = _candle_channel(uppercase_symbol, interval)
+    queue = channel.subscribe()
     try:
-        async for update in iter_future_candles(uppercase_symbol, interval):
-            candle = update["candle"]
-            
-            # 实时检查止盈止损和限价单（每次更新都检查，包括未完成的K线）
-            _check_and_trigger_tpsl("realtime", uppercase_symbol, interval, candle)
-            
-            await websocket.send_json({
-                "type": "update",
-                "symbol": uppercase_symbol,
-                "interval": interval,
-                "candle": candle,
-                "final": update.get("final", True),
-            })
+        while True:
+            item = await queue.get()
+            if item is None:
+                await websocket.close(code=1011, reason="Internal server error")
+                return
+            # Give a burst a moment to pile up, then send it as one frame.
+            await asyncio.sleep(WS_BATCH_WINDOW)
+            items = [item]
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is None:
+                    queue.put(None)
+                    break
+                last_time, last_final, _ = items[-1]
+                # A later tick of the same open candle supersedes the earlier one.
+                if not last_final and last_time == item[0]:
+                    items[-1] = item
+                else:
+                    items.append(item)
+
+            if len(items) == 1:
+                await websocket.send_text(items[0][2])
+            else:
+                # Updates are already encoded; splice them into the batch envelope.
+                await websocket.send_text(
+                    '{"type":"batch","updates":[' + ",".join(text for _, _, text in items) + "]}"
+                )
     except WebSocketDisconnect:
         return
     except Exception:
         await websocket.close(code=1011, reason="Internal server error")
+    finally:
+        channel.unsubscribe(queue)
 
 
 # ============ Trading API Endpoints ============
@@ -495,14 +744,13 @@ def get_account(
 ):
     """Get account information. Defaults to realtime mode and 1m interval if not provided."""
     try:
-        return _account_payload(
-            symbol,
-            mode,
-            interval,
-            orders_limit=orders_limit,
-            trades_limit=trades_limit,
-            closed_positions_limit=closed_positions_limit,
+        body = _account_snapshot_body(
+            *_normalize_account_params(symbol, mode, interval),
+            _normalize_limit(orders_limit),
+            _normalize_limit(trades_limit),
+            _normalize_limit(closed_positions_limit),
         )
+        return Response(content=body, media_type="application/json")
     except HTTPException:
         raise
     except Exception as exc:
@@ -518,6 +766,10 @@ def get_account_by_mode(
     return get_account(symbol=symbol, mode=mode, interval=interval)
 
 
+# Most account events coalesced into one /ws/account frame.
+WS_ACCOUNT_BATCH_MAX = 64
+
+
 @app.websocket("/ws/account")
 async def account_events(
     websocket: WebSocket,
@@ -529,7 +781,7 @@ async def account_events(
     closed_positions_limit: Optional[int] = None,
 ) -> None:
     try:
-        account_id, account, _, _, _ = _resolve_account(symbol, mode, interval)
+        account_id, _, normalized_mode, interval_value, uppercase_symbol = _resolve_account(symbol, mode, interval)
     except HTTPException as exc:
         await websocket.close(code=4400, reason=exc.detail)
         return
@@ -537,25 +789,30 @@ async def account_events(
     await websocket.accept()
 
     try:
-        orders_limit_value = _normalize_limit(orders_limit)
-        trades_limit_value = _normalize_limit(trades_limit)
-        closed_limit_value = _normalize_limit(closed_positions_limit)
-        stats = get_account_stats(account_id)
-        snapshot = _serialize_account(
-            account,
-            stats,
-            account_id,
-            orders_limit=orders_limit_value,
-            trades_limit=trades_limit_value,
-            closed_positions_limit=closed_limit_value,
+        # Same encoded body /api/account serves; reconnects within one account
+        # version reuse it instead of re-serializing.
+        snapshot = _account_snapshot_body(
+            uppercase_symbol,
+            normalized_mode,
+            interval_value,
+            _normalize_limit(orders_limit),
+            _normalize_limit(trades_limit),
+            _normalize_limit(closed_positions_limit),
         )
-        await websocket.send_json({"type": "snapshot", "account": snapshot})
+        await websocket.send_text('{"type":"snapshot","account":' + snapshot.decode() + "}")
 
         queue = await events_subscribe(account_id)
         try:
             while True:
-                payload = await queue.get()
-                await websocket.send_json(payload)
+                # Events arrive already encoded; see events_bus.notify. Whatever
+                # else is already queued goes out in the same frame.
+                events = [await queue.get()]
+                while len(events) < WS_ACCOUNT_BATCH_MAX and not queue.empty():
+                    events.append(queue.get_nowait())
+                if len(events) == 1:
+                    await websocket.send_text(events[0])
+                else:
+                    await websocket.send_text('{"type":"batch","events":[' + ",".join(events) + "]}")
         finally:
             await events_unsubscribe(account_id, queue)
     except WebSocketDisconnect:
@@ -564,31 +821,24 @@ async def account_events(
         await websocket.close(code=1011, reason=str(exc))
 
 
-@app.post("/api/orders")
+@app.post("/api/orders", openapi_extra=_json_body(OrderPayload.model_json_schema()))
 async def place_order(
-    payload: OrderPayload,
+    request: Request,
     mode: Optional[str] = Query(None, description="Trading mode"),
     interval: Optional[str] = Query(None, description="Interval used for pricing"),
 ):
     """Place an order using the latest backend price for market orders."""
+    payload: OrderPayload = await _parse_body(request, OrderPayload.model_validate_json)
     try:
-        uppercase_symbol = _validate_symbol(payload.symbol)
-    except HTTPException as exc:
-        raise exc
-
-    normalized_mode = _normalize_mode(mode)
-    interval_value = _normalize_interval(interval)
-
-    try:
-        account_id, account = get_or_create_account(normalized_mode, uppercase_symbol, interval_value)
-        engine = get_trading_engine(account_id, account)
-
-        logger.debug(
-            "[Orders] request body=%s mode=%s interval=%s",
-            payload.model_dump(),
-            normalized_mode,
-            interval_value,
-        )
+        engine, normalized_mode, interval_value, uppercase_symbol = _resolve_engine(payload.symbol, mode, interval)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[Orders] request body=%s mode=%s interval=%s",
+                payload.model_dump(),
+                normalized_mode,
+                interval_value,
+            )
 
         if payload.type == "market":
             latest_price = payload.current_price
@@ -596,7 +846,9 @@ async def place_order(
                 latest_price = get_latest_price(uppercase_symbol, interval_value)
             if latest_price is None:
                 raise HTTPException(status_code=503, detail="Latest market price unavailable")
-            order = engine.place_market_order(
+            # 引擎调用可能要等 TP/SL 线程释放账户锁，放到线程池里不阻塞事件循环
+            order = await run_in_threadpool(
+                engine.place_market_order,
                 uppercase_symbol,
                 payload.direction,
                 payload.quantity,
@@ -604,25 +856,15 @@ async def place_order(
             )
         else:
             assert payload.price is not None  # validator guarantees
-            order = engine.place_limit_order(
+            order = await run_in_threadpool(
+                engine.place_limit_order,
                 uppercase_symbol,
                 payload.direction,
                 payload.quantity,
                 payload.price,
             )
 
-        return {
-            "id": order.id,
-            "symbol": order.symbol,
-            "direction": order.direction,
-            "type": order.type,
-            "quantity": order.quantity,
-            "price": order.price,
-            "create_time": order.create_time,
-            "filled_quantity": order.filled_quantity,
-            "filled_price": order.filled_price,
-            "status": order.status,
-        }
+        return order.to_dict()
     except HTTPException:
         raise
     except ValueError as exc:
@@ -640,27 +882,10 @@ def list_orders(
     offset: int = Query(0, ge=0),
 ):
     """List orders."""
-    try:
-        _, account, _, _, _ = _resolve_account(symbol, mode, interval)
-        ordered = sorted(account.orders, key=lambda o: getattr(o, "create_time", 0), reverse=True)
-        total = len(ordered)
-        paged = ordered[offset:offset + limit]
-
-        items = [
-            {
-                "id": o.id,
-                "symbol": o.symbol,
-                "direction": o.direction,
-                "type": o.type,
-                "quantity": o.quantity,
-                "price": o.price,
-                "create_time": o.create_time,
-                "filled_quantity": o.filled_quantity,
-                "filled_price": o.filled_price,
-                "status": o.status,
-            }
-            for o in paged
-        ]
+    def build(_account_id: int, account) -> Dict[str, Any]:
+        paged, total = _paginate_items(account.orders, limit, offset)
+
+        items = [o.to_dict() for o in paged]
 
         return {
             "items": items,
@@ -669,6 +894,11 @@ def list_orders(
             "offset": offset,
             "has_more": offset + len(items) < total,
         }
+
+    try:
+        return _cached_account_response("orders", symbol, mode, interval, (limit, offset), build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -682,10 +912,9 @@ async def cancel_order(
 ):
     """Cancel an order."""
     try:
-        account_id, account, _, _, _ = _resolve_account(symbol, mode, interval)
-        engine = get_trading_engine(account_id, account)
+        engine, _, _, _ = _resolve_engine(symbol, mode, interval)
         
-        if engine.cancel_order(order_id):
+        if await run_in_threadpool(engine.cancel_order, order_id):
             return {"success": True, "id": order_id}
         else:
             raise HTTPException(status_code=404, detail="Order not found or already filled")
@@ -704,24 +933,10 @@ def list_trades(
     offset: int = Query(0, ge=0),
 ):
     """List trades."""
-    try:
-        _, account, _, _, _ = _resolve_account(symbol, mode, interval)
-        ordered = sorted(account.trades, key=lambda t: getattr(t, "timestamp", 0), reverse=True)
-        total = len(ordered)
-        paged = ordered[offset:offset + limit]
-
-        items = [
-            {
-                "id": t.id,
-                "symbol": t.symbol,
-                "direction": t.direction,
-                "quantity": t.quantity,
-                "price": t.price,
-                "timestamp": t.timestamp,
-                "commission": t.commission,
-            }
-            for t in paged
-        ]
+    def build(_account_id: int, account) -> Dict[str, Any]:
+        paged, total = _paginate_items(account.trades, limit, offset)
+
+        items = [t.to_dict() for t in paged]
 
         return {
             "items": items,
@@ -730,6 +945,11 @@ def list_trades(
             "offset": offset,
             "has_more": offset + len(items) < total,
         }
+
+    try:
+        return _cached_account_response("trades", symbol, mode, interval, (limit, offset), build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -743,29 +963,10 @@ def list_closed_positions(
     offset: int = Query(0, ge=0),
 ):
     """List closed positions (completed trades from entry to exit)."""
-    try:
-        _, account, _, _, _ = _resolve_account(symbol, mode, interval)
-        ordered = sorted(account.closed_positions, key=lambda cp: getattr(cp, "exit_time", 0), reverse=True)
-        total = len(ordered)
-        paged = ordered[offset:offset + limit]
-
-        items = [
-            {
-                "id": cp.id,
-                "symbol": cp.symbol,
-                "direction": cp.direction,
-                "quantity": cp.quantity,
-                "entry_price": cp.entry_price,
-                "entry_time": cp.entry_time,
-                "exit_price": cp.exit_price,
-                "exit_time": cp.exit_time,
-                "profit_loss": cp.profit_loss,
-                "commission": cp.commission,
-                "days_held": cp.days_held(),
-                "return_pct": cp.return_pct(),
-            }
-            for cp in paged
-        ]
+    def build(_account_id: int, account) -> Dict[str, Any]:
+        paged, total = _paginate_items(account.closed_positions, limit, offset)
+
+        items = [cp.to_dict() for cp in paged]
 
         return {
             "items": items,
@@ -774,6 +975,11 @@ def list_closed_positions(
             "offset": offset,
             "has_more": offset + len(items) < total,
         }
+
+    try:
+        return _cached_account_response("closed_positions", symbol, mode, interval, (limit, offset), build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -785,27 +991,15 @@ def get_stats(
     interval: Optional[str] = Query(None),
 ):
     """Get account statistics."""
-    try:
-        account_id, account, _, _, _ = _resolve_account(symbol, mode, interval)
-        engine = get_trading_engine(account_id, account)
-        stats = engine.calculate_stats()
+    def build(account_id: int, account) -> Dict[str, Any]:
+        # The engine memoises the stats until closed_positions changes.
+        stats = get_trading_engine(account_id, account).calculate_stats()
+        return dict(zip(_STATS_FIELDS, _stats_values(stats)))
 
-        return {
-            "total_trades": stats.total_trades,
-            "winning_trades": stats.winning_trades,
-            "losing_trades": stats.losing_trades,
-            "win_rate": stats.win_rate,
-            "total_profit": stats.total_profit,
-            "total_loss": stats.total_loss,
-            "profit_factor": stats.profit_factor,
-            "expectancy": stats.expectancy,
-            "max_drawdown": stats.max_drawdown,
-            "max_drawdown_pct": stats.max_drawdown_pct,
-            "sharpe_ratio": stats.sharpe_ratio,
-            "cagr": stats.cagr,
-            "cumulative_return": stats.cumulative_return,
-            "total_return": stats.total_return,
-        }
+    try:
+        return _cached_account_response("stats", symbol, mode, interval, (), build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -829,10 +1023,9 @@ async def set_position_tpsl(
 ):
     """Set take profit and stop loss for a position."""
     try:
-        account_id, account, _, _, uppercase_symbol = _resolve_account(symbol, mode, interval)
-        engine = get_trading_engine(account_id, account)
+        engine, _, _, uppercase_symbol = _resolve_engine(symbol, mode, interval)
         
-        success = engine.set_position_tpsl(uppercase_symbol, take_profit_price, stop_loss_price)
+        success = await run_in_threadpool(engine.set_position_tpsl, uppercase_symbol, take_profit_price, stop_loss_price)
         
         return {
             "success": success,
@@ -868,18 +1061,26 @@ def daily_pnl(
     days_in_month = monthrange(start_dt.year, start_dt.month)[1]
     end_dt = start_dt + timedelta(days=days_in_month)
 
-    daily: Dict[str, float] = {}
-    for cp in account.closed_positions:
-        exit_dt = datetime.fromtimestamp(cp.exit_time, tz=timezone.utc)
-        if not (start_dt <= exit_dt < end_dt):
-            continue
-        date_key = exit_dt.strftime("%Y-%m-%d")
+    # closed_positions is ordered by exit_time, so bisect to the month and bucket
+    # by integer day offset instead of building a datetime per position.
+    start_ts = int(start_dt.timestamp())
+    end_ts = int(end_dt.timestamp())
+    closed = account.closed_positions
+    lo = bisect_left(closed, start_ts, key=CLOSED_POSITION_TIME)
+    hi = bisect_left(closed, end_ts, lo=lo, key=CLOSED_POSITION_TIME)
+
+    daily: List[Optional[float]] = [None] * days_in_month
+    for cp in closed[lo:hi]:
+        day = (cp.exit_time - start_ts) // 86400
         net_pnl = cp.profit_loss - cp.commission
-        daily[date_key] = daily.get(date_key, 0.0) + net_pnl
+        total = daily[day]
+        daily[day] = net_pnl if total is None else total + net_pnl
 
+    month_prefix = start_dt.strftime("%Y-%m-")
     days_payload = [
-        {"date": day, "pnl": value}
-        for day, value in sorted(daily.items())
+        {"date": f"{month_prefix}{day + 1:02d}", "pnl": value}
+        for day, value in enumerate(daily)
+        if value is not None
     ]
 
     return {"month": month, "days": days_payload}
@@ -892,4 +1093,11 @@ def daily_pnl_by_mode(
     interval: str = Query(...),
     month: str = Query(..., description="Month in YYYY-MM format (UTC)"),
 ):
-    return daily_pnl(symbol=symbol, month=month, mode=mode, interval=interval)
\ No newline at end of file
+    return daily_pnl(symbol=symbol, month=month, mode=mode, interval=interval)
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvicorn installs the uvloop policy before creating the loop; the startup
+    # hook above then registers that loop with the events bus.
+    uvicorn.run(app, host="127.0.0.1", port=8000, loop="uvloop", http="httptools", ws="websockets")
@@ -11,6 +11,7 @@ class InstrumentResponse(BaseModel):
 
 class Candle(BaseModel):
     time: int = Field(..., description="Unix timestamp in seconds")
+    close_time: int = Field(..., description="Close timestamp in seconds")
     open: float
     high: float
     low: float
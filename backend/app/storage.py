@@ -1,87 +1,306 @@
+import os
+import queue
 import sqlite3
-from typing import Iterable, List, Optional, Tuple
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Iterator, Iterable, List, Optional, Tuple
 
 from .config import DATA_DIR, INTERVAL_SECONDS
 
 DB_PATH = DATA_DIR / "candles.db"
+_CANDLE_TABLE_COLUMNS = "symbol, interval, open_time, close_time, open, high, low, close, volume"
+# Column affinities (INTEGER/REAL, NOT NULL) already give Python int/float, so rows
+# from SELECT _CANDLE_COLUMNS map straight onto these keys with no coercion.
+_CANDLE_COLUMNS = "open_time, close_time, open, high, low, close, volume"
+_CANDLE_KEYS = ("time", "close_time", "open", "high", "low", "close", "volume")
+_CANDLE_PRICES = itemgetter("open", "high", "low", "close", "volume")
+
+# Reads map pages straight from the OS cache instead of pread()+copy; 0 disables.
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Rows per write transaction; bulk backfills are split into slices of this size so
+# the WAL can checkpoint in between.
+SAVE_BATCH_SIZE = 10_000
+
+
+@lru_cache(maxsize=256)
+def _symbol_key(symbol: str) -> str:
+    """Upper-cased, interned symbol; callers pass the same few symbols on every tick."""
+    return sys.intern(symbol.upper())
+
 
 def _connect() -> sqlite3.Connection:
     conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
+    # Per-connection settings; journal_mode=WAL is persistent and set in init_db.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA wal_autocheckpoint=1000")
     return conn
 
-def init_db() -> None:
-    with _connect() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS candles (
-                symbol TEXT NOT NULL,
-                interval TEXT NOT NULL,
-                open_time INTEGER NOT NULL,
-                close_time INTEGER NOT NULL,
-                open REAL NOT NULL,
-                high REAL NOT NULL,
-                low REAL NOT NULL,
-                close REAL NOT NULL,
-                volume REAL NOT NULL,
-                PRIMARY KEY (symbol, interval, open_time)
+# Connections are opened lazily and reused for the life of the process: one writer
+# (SQLite serializes writers anyway) and up to READER_POOL_SIZE query_only readers,
+# which WAL lets run concurrently with the writer.
+READER_POOL_SIZE = 4
+_WRITE_LOCK = threading.Lock()
+_writer_conn: Optional[sqlite3.Connection] = None
+_READERS: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+_READERS_LOCK = threading.Lock()
+_readers_opened = 0
+_INIT_LOCK = threading.Lock()
+_initialized = False
+
+# (symbol, interval) -> (MIN(open_time), MAX(open_time), monotonic time of the query).
+# save_candles widens an entry in place and deletes drop it; the version stops a reader
+# that raced a write from caching what it saw before that write. Other processes (e.g.
+# scripts/refresh_after.py) write the same file, so an entry is only trusted for
+# TIME_RANGE_TTL seconds after it was read from the database.
+TIME_RANGE_TTL = 30.0
+_TIME_RANGES: Dict[Tuple[str, str], Tuple[Optional[int], Optional[int], float]] = {}
+_TIME_RANGES_LOCK = threading.Lock()
+_time_ranges_version = 0
+
+
+def _widen_time_range(key: Tuple[str, str], first: int, last: int) -> None:
+    global _time_ranges_version
+    with _TIME_RANGES_LOCK:
+        _time_ranges_version += 1
+        cached = _TIME_RANGES.get(key)
+        if cached is not None:
+            low, high, read_at = cached
+            _TIME_RANGES[key] = (
+                first if low is None else min(low, first),
+                last if high is None else max(high, last),
+                read_at,
             )
-            """
-        )
-        conn.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_candles_symbol_interval_time
-            ON candles(symbol, interval, open_time)
-            """
-        )
+
+
+def _forget_time_range(key: Tuple[str, str]) -> None:
+    global _time_ranges_version
+    with _TIME_RANGES_LOCK:
+        _time_ranges_version += 1
+        _TIME_RANGES.pop(key, None)
+
+
+@contextmanager
+def _writer() -> Iterator[sqlite3.Connection]:
+    """Exclusive use of the writer connection; commits on success, rolls back on error."""
+    global _writer_conn
+    with _WRITE_LOCK:
+        if _writer_conn is None:
+            ensure_initialized()
+            _writer_conn = _connect()
+        with _writer_conn:
+            yield _writer_conn
+
+
+@contextmanager
+def _reader() -> Iterator[sqlite3.Connection]:
+    """Check a reader connection out of the pool for the duration of the block."""
+    global _readers_opened
+    try:
+        conn = _READERS.get_nowait()
+    except queue.Empty:
+        with _READERS_LOCK:
+            opened = _readers_opened < READER_POOL_SIZE
+            if opened:
+                _readers_opened += 1
+        if opened:
+            ensure_initialized()
+            conn = _connect()
+            conn.execute("PRAGMA query_only=1")
+        else:
+            conn = _READERS.get()
+    try:
+        yield conn
+    finally:
+        _READERS.put(conn)
+
+
+_CREATE_CANDLES = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        symbol TEXT NOT NULL,
+        interval TEXT NOT NULL,
+        open_time INTEGER NOT NULL,
+        close_time INTEGER NOT NULL,
+        open REAL NOT NULL,
+        high REAL NOT NULL,
+        low REAL NOT NULL,
+        close REAL NOT NULL,
+        volume REAL NOT NULL,
+        PRIMARY KEY (symbol, interval, open_time)
+    ) WITHOUT ROWID
+"""
+
+
+def init_db() -> None:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        # The primary key b-tree *is* the table, so range scans read OHLCV straight
+        # from the key order with no second lookup per row.
+        conn.execute(_CREATE_CANDLES.format(name="candles"))
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'candles'"
+        ).fetchone()
+        if "WITHOUT ROWID" not in row[0].upper():
+            # One-time rebuild of databases created with the older rowid table.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DROP TABLE IF EXISTS candles_rebuild")
+                conn.execute(_CREATE_CANDLES.format(name="candles_rebuild"))
+                conn.execute(f"INSERT INTO candles_rebuild SELECT {_CANDLE_TABLE_COLUMNS} FROM candles")
+                conn.execute("DROP TABLE candles")
+                conn.execute("ALTER TABLE candles_rebuild RENAME TO candles")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        # Duplicated the primary key prefix; only cost writes.
+        conn.execute("DROP INDEX IF EXISTS idx_candles_symbol_interval_time")
+    finally:
+        conn.close()
+
+
+def ensure_initialized() -> None:
+    """Create the schema once per process; the pool calls this before opening connections."""
+    global _initialized
+    if _initialized:
+        return
+    with _INIT_LOCK:
+        if not _initialized:
+            init_db()
+            _initialized = True
+
+
+_UPSERT_CANDLE = """
+    INSERT INTO candles (
+        symbol, interval, open_time, close_time, open, high, low, close, volume
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(symbol, interval, open_time) DO UPDATE SET
+        close_time = excluded.close_time,
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+"""
 
 
 def save_candles(symbol: str, interval: str, candles: Iterable[dict]) -> None:
-    step = INTERVAL_SECONDS[interval]
-    filtered_rows = []
-    upper_symbol = symbol.upper()
-
-    for candle in candles:
-        open_time = int(candle["time"])
-        close_time = int(candle.get("close_time", open_time))
-        # Binance sends in-progress candles with close_time < open_time + step - 1.
-        if close_time < open_time + step - 1:
-            continue
-
-        filtered_rows.append(
-            (
-                upper_symbol,
-                interval,
-                open_time,
-                close_time,
-                float(candle["open"]),
-                float(candle["high"]),
-                float(candle["low"]),
-                float(candle["close"]),
-                float(candle["volume"]),
-            )
-        )
+    min_span = INTERVAL_SECONDS[interval] - 1
+    upper_symbol = _symbol_key(symbol)
+    prices = _CANDLE_PRICES
+
+    # Binance sends in-progress candles with close_time < open_time + step - 1.
+    filtered_rows = [
+        (upper_symbol, interval, open_time, close_time, *map(float, prices(candle)))
+        for candle in candles
+        for open_time in (int(candle["time"]),)
+        for close_time in (int(candle.get("close_time", open_time)),)
+        if close_time >= open_time + min_span
+    ]
 
     if not filtered_rows:
         return
 
-    with _connect() as conn:
-        conn.executemany(
-            """
-            INSERT INTO candles (
-                symbol, interval, open_time, close_time, open, high, low, close, volume
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(symbol, interval, open_time) DO UPDATE SET
-                close_time = excluded.close_time,
-                open = excluded.open,
-                high = excluded.high,
-                low = excluded.low,
-                close = excluded.close,
-                volume = excluded.volume
-            """,
-            filtered_rows,
-        )
-        conn.commit()
+    jobs = [
+        _SaveJob((upper_symbol, interval), filtered_rows[start:start + SAVE_BATCH_SIZE])
+        for start in range(0, len(filtered_rows), SAVE_BATCH_SIZE)
+    ]
+    _start_save_thread()
+    for job in jobs:
+        _SAVE_QUEUE.put(job)
+    for job in jobs:
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+
+
+class _SaveJob:
+    __slots__ = ("key", "rows", "done", "error")
+
+    def __init__(self, key: Tuple[str, str], rows: List[tuple]) -> None:
+        self.key = key
+        self.rows = rows
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+# Every save_candles call, across all symbols and intervals, hands its rows to one
+# writer thread. Whatever has queued up while the previous transaction ran goes into
+# the next one (up to SAVE_BATCH_SIZE rows), so concurrent live appends share a
+# single commit instead of each paying their own.
+_SAVE_QUEUE: "queue.Queue[_SaveJob]" = queue.Queue()
+_SAVE_THREAD_LOCK = threading.Lock()
+_save_thread: Optional[threading.Thread] = None
+
+
+def _start_save_thread() -> None:
+    global _save_thread
+    if _save_thread is not None:
+        return
+    with _SAVE_THREAD_LOCK:
+        if _save_thread is None:
+            thread = threading.Thread(target=_save_loop, name="candle-writer", daemon=True)
+            thread.start()
+            _save_thread = thread
+
+
+def _save_loop() -> None:
+    while True:
+        batch = [_SAVE_QUEUE.get()]
+        total = len(batch[0].rows)
+        while total < SAVE_BATCH_SIZE:
+            try:
+                job = _SAVE_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(job)
+            total += len(job.rows)
+        _commit_batch(batch)
+
+
+def _commit_batch(batch: List[_SaveJob]) -> None:
+    try:
+        with _writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for job in batch:
+                conn.executemany(_UPSERT_CANDLE, job.rows)
+            conn.execute("COMMIT")
+    except BaseException as exc:
+        if len(batch) > 1:
+            # The group rolled back as a whole; retry each job alone so only the
+            # caller whose rows are bad sees the error.
+            for job in batch:
+                _commit_batch([job])
+            return
+        for job in batch:
+            # Other slices of the same call may have committed; let readers re-query.
+            _forget_time_range(job.key)
+            job.error = exc
+            job.done.set()
+        return
+
+    for job in batch:
+        open_times = [row[2] for row in job.rows]
+        _widen_time_range(job.key, min(open_times), max(open_times))
+        job.done.set()
+
+
+_MIN_TIME = -(2 ** 63)
+_MAX_TIME = 2 ** 63 - 1
+_FETCH_CANDLES_QUERY = f"""
+    SELECT {_CANDLE_COLUMNS}
+    FROM candles
+    WHERE symbol = ? AND interval = ? AND open_time BETWEEN ? AND ?
+    ORDER BY open_time ASC
+    LIMIT ?
+"""
 
 
 def fetch_candles(
@@ -91,56 +310,20 @@ def fetch_candles(
     end_ts: Optional[int],
     limit: Optional[int] = None,
 ) -> List[dict]:
-    conditions = []
-    params: List[object] = [symbol.upper(), interval]
-    if start_ts is not None:
-        conditions.append("open_time >= ?")
-        params.append(start_ts)
-    if end_ts is not None:
-        conditions.append("open_time <= ?")
-        params.append(end_ts)
-
-    query = (
-        "SELECT open_time, close_time, open, high, low, close, volume\n"
-        "FROM candles\n"
-        "WHERE symbol = ? AND interval = ?"
+    # Open bounds bind sentinels so every call reuses the one cached prepared statement.
+    params = (
+        _symbol_key(symbol),
+        interval,
+        _MIN_TIME if start_ts is None else start_ts,
+        _MAX_TIME if end_ts is None else end_ts,
+        -1 if limit is None else limit,  # negative LIMIT means no limit in SQLite
     )
-    if conditions:
-        query += " AND " + " AND ".join(conditions)
-
-    query += " ORDER BY open_time ASC"
-    if limit is not None:
-        query += " LIMIT ?"
-        params.append(limit)
-
-    with _connect() as conn:
-        rows = conn.execute(query, params).fetchall()
-
-    candles: List[dict] = []
-    for row in rows:
-        candles.append(
-            {
-                "time": int(row["open_time"]),
-                "close_time": int(row["close_time"]),
-                "open": float(row["open"]),
-                "high": float(row["high"]),
-                "low": float(row["low"]),
-                "close": float(row["close"]),
-                "volume": float(row["volume"]),
-            }
-        )
-
-    if not candles:
-        return candles
+    with _reader() as conn:
+        rows = conn.execute(_FETCH_CANDLES_QUERY, params).fetchall()
 
-    step = INTERVAL_SECONDS[interval]
-    min_span = step - 1
-    filtered: List[dict] = []
-    for idx, candle in enumerate(candles):
-        complete = candle["close_time"] >= candle["time"] + min_span
-        if complete or idx == len(candles) - 1:
-            filtered.append(candle)
-    return filtered
+    # save_candles rejects in-progress candles, so every stored row is complete.
+    keys = _CANDLE_KEYS
+    return [dict(zip(keys, row)) for row in rows]
 
 
 def fetch_after(symbol: str, interval: str, after_ts: int) -> List[dict]:
@@ -150,45 +333,27 @@ def fetch_after(symbol: str, interval: str, after_ts: int) -> List[dict]:
 
 
 def get_latest_open_time(symbol: str, interval: str) -> Optional[int]:
-    with _connect() as conn:
-        row = conn.execute(
-            """
-            SELECT open_time FROM candles
-            WHERE symbol = ? AND interval = ?
-            ORDER BY open_time DESC
-            LIMIT 1
-            """,
-            (symbol.upper(), interval),
-        ).fetchone()
-    return int(row["open_time"]) if row else None
+    return get_time_range(symbol, interval)[1]
 
 
 def get_latest_candle(symbol: str, interval: str) -> Optional[dict]:
     """Fetch the latest completed candle for the given symbol/interval."""
-    with _connect() as conn:
+    with _reader() as conn:
         row = conn.execute(
-            """
-            SELECT open_time, close_time, open, high, low, close, volume
+            f"""
+            SELECT {_CANDLE_COLUMNS}
             FROM candles
             WHERE symbol = ? AND interval = ?
             ORDER BY open_time DESC
             LIMIT 1
             """,
-            (symbol.upper(), interval),
+            (_symbol_key(symbol), interval),
         ).fetchone()
 
     if row is None:
         return None
 
-    return {
-        "time": int(row["open_time"]),
-        "close_time": int(row["close_time"]),
-        "open": float(row["open"]),
-        "high": float(row["high"]),
-        "low": float(row["low"]),
-        "close": float(row["close"]),
-        "volume": float(row["volume"]),
-    }
+    return dict(zip(_CANDLE_KEYS, row))
 
 
 def get_latest_price(symbol: str, interval: str) -> Optional[float]:
@@ -198,33 +363,43 @@ def get_latest_price(symbol: str, interval: str) -> Optional[float]:
 
 
 def get_time_range(symbol: str, interval: str) -> Tuple[Optional[int], Optional[int]]:
-    with _connect() as conn:
-        row = conn.execute(
+    key = (_symbol_key(symbol), interval)
+    cached = _TIME_RANGES.get(key)
+    now = time.monotonic()
+    if cached is not None and now - cached[2] < TIME_RANGE_TTL:
+        return cached[0], cached[1]
+
+    version = _time_ranges_version
+    with _reader() as conn:
+        low, high = conn.execute(
             """
-            SELECT MIN(open_time) AS min_time, MAX(open_time) AS max_time
+            SELECT MIN(open_time), MAX(open_time)
             FROM candles
             WHERE symbol = ? AND interval = ?
             """,
-            (symbol.upper(), interval),
+            key,
         ).fetchone()
-    if row is None:
-        return None, None
-    min_time = row["min_time"]
-    max_time = row["max_time"]
-    return (int(min_time) if min_time is not None else None, int(max_time) if max_time is not None else None)
-
-
-def _fetch_open_times(symbol: str, interval: str, start_ts: int, end_ts: int) -> List[Tuple[int, int]]:
-    with _connect() as conn:
-        rows = conn.execute(
-            """
-            SELECT open_time, close_time FROM candles
-            WHERE symbol = ? AND interval = ? AND open_time BETWEEN ? AND ?
-            ORDER BY open_time ASC
-            """,
-            (symbol.upper(), interval, start_ts, end_ts),
-        ).fetchall()
-    return [(int(row["open_time"]), int(row["close_time"])) for row in rows]
+    with _TIME_RANGES_LOCK:
+        # A write since we read the version may have made this result stale.
+        if version == _time_ranges_version:
+            _TIME_RANGES[key] = (low, high, now)
+    return low, high
+
+
+# First row in the range that ends a gap (open_time at least one step past where the
+# previous candle left off) or is itself incomplete. LAG keeps the walk inside SQLite.
+_FIRST_GAP_QUERY = """
+    WITH ordered AS (
+        SELECT open_time, close_time, LAG(open_time) OVER (ORDER BY open_time) AS prev_time
+        FROM candles
+        WHERE symbol = ? AND interval = ? AND open_time BETWEEN ? AND ?
+    )
+    SELECT open_time, close_time, prev_time FROM ordered
+    WHERE open_time >= COALESCE(prev_time + ?, ?) + ?
+       OR (close_time < open_time + ? AND open_time < ?)
+    ORDER BY open_time ASC
+    LIMIT 1
+"""
 
 
 def find_missing_segment(symbol: str, interval: str, start_ts: int, end_ts: int) -> Optional[Tuple[int, int]]:
@@ -232,19 +407,29 @@ def find_missing_segment(symbol: str, interval: str, start_ts: int, end_ts: int)
         return None
 
     step = INTERVAL_SECONDS[interval]
-    expected = start_ts
-    open_times = _fetch_open_times(symbol, interval, start_ts, end_ts)
-
-    for open_time, close_time in open_times:
-        if open_time > expected:
-            missing_end = min(open_time - step, end_ts)
-            if missing_end >= expected:
-                return expected, missing_end
-        min_required_close = open_time + step - 1
-        if close_time < min_required_close and open_time < end_ts:
-            return open_time, min(open_time, end_ts)
-        expected = open_time + step
-
+    upper_symbol = _symbol_key(symbol)
+    with _reader() as conn:
+        row = conn.execute(
+            _FIRST_GAP_QUERY,
+            (upper_symbol, interval, start_ts, end_ts, step, start_ts, step, step - 1, end_ts),
+        ).fetchone()
+        if row is None:
+            (last_open,) = conn.execute(
+                """
+                SELECT MAX(open_time) FROM candles
+                WHERE symbol = ? AND interval = ? AND open_time BETWEEN ? AND ?
+                """,
+                (upper_symbol, interval, start_ts, end_ts),
+            ).fetchone()
+
+    if row is not None:
+        open_time, close_time, prev_time = row
+        expected = start_ts if prev_time is None else prev_time + step
+        if open_time >= expected + step:
+            return expected, min(open_time - step, end_ts)
+        return open_time, min(open_time, end_ts)
+
+    expected = start_ts if last_open is None else last_open + step
     if expected <= end_ts:
         return expected, end_ts
 
@@ -252,22 +437,20 @@ def find_missing_segment(symbol: str, interval: str, start_ts: int, end_ts: int)
 
 
 def delete_older_than(symbol: str, interval: str, keep_start_ts: int) -> None:
-    with _connect() as conn:
+    key = (_symbol_key(symbol), interval)
+    with _writer() as conn:
         conn.execute(
             "DELETE FROM candles WHERE symbol = ? AND interval = ? AND open_time < ?",
-            (symbol.upper(), interval, keep_start_ts),
+            (*key, keep_start_ts),
         )
-        conn.commit()
+    _forget_time_range(key)
 
 
 def delete_after(symbol: str, interval: str, cutoff_ts: int) -> None:
-    with _connect() as conn:
+    key = (_symbol_key(symbol), interval)
+    with _writer() as conn:
         conn.execute(
             "DELETE FROM candles WHERE symbol = ? AND interval = ? AND open_time >= ?",
-            (symbol.upper(), interval, cutoff_ts),
+            (*key, cutoff_ts),
         )
-        conn.commit()
-
-
-# Initialize database when module is imported.
-init_db()
+    _forget_time_range(key)
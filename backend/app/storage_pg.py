@@ -1,35 +1,71 @@
 """PostgreSQL/TimescaleDB storage for candle data."""
 from __future__ import annotations
 
+import io
 import os
-from typing import Iterable, List, Optional, Tuple
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import psycopg2
-from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 from .config import INTERVAL_SECONDS
 
 
+# Connections are reused across calls instead of paying TCP + auth on every query.
+PG_POOL_MIN = int(os.getenv("PG_POOL_MIN", "2"))
+PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", "16"))
+_POOL: Optional[ThreadedConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+# ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait instead.
+_POOL_SLOTS = threading.BoundedSemaphore(PG_POOL_MAX)
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    """Create the pool from DATABASE_URL or PG* env vars on first use."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                url = os.getenv("DATABASE_URL")
+                if url:
+                    _POOL = ThreadedConnectionPool(PG_POOL_MIN, PG_POOL_MAX, url)
+                else:
+                    _POOL = ThreadedConnectionPool(
+                        PG_POOL_MIN,
+                        PG_POOL_MAX,
+                        host=os.getenv("PGHOST", "127.0.0.1"),
+                        port=os.getenv("PGPORT", "5432"),
+                        user=os.getenv("PGUSER", "postgres"),
+                        password=os.getenv("PGPASSWORD", ""),
+                        dbname=os.getenv("PGDATABASE", "papertrade"),
+                    )
+    return _POOL
+
+
+@contextmanager
+def _pooled() -> Iterator["psycopg2.extensions.connection"]:
+    """Check an autocommit connection out of the pool for the duration of the block."""
+    pool = _get_pool()
+    with _POOL_SLOTS:
+        conn = pool.getconn()
+        try:
+            conn.autocommit = True
+            yield conn
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
+
+
 def _connect():
-    """Create a PostgreSQL connection using DATABASE_URL or PG* env vars."""
-    url = os.getenv("DATABASE_URL")
-    if url:
-        conn = psycopg2.connect(url)
-    else:
-        conn = psycopg2.connect(
-            host=os.getenv("PGHOST", "127.0.0.1"),
-            port=os.getenv("PGPORT", "5432"),
-            user=os.getenv("PGUSER", "postgres"),
-            password=os.getenv("PGPASSWORD", ""),
-            dbname=os.getenv("PGDATABASE", "papertrade"),
-        )
-    conn.autocommit = True
-    return conn
+    ensure_initialized()
+    return _pooled()
 
 
 def init_db() -> None:
     """Initialize candles table and (optionally) Timescale hypertable."""
-    with _connect() as conn:
+    with _pooled() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -47,14 +83,59 @@ def init_db() -> None:
                 )
                 """
             )
-            # Try to enable TimescaleDB features if available; ignore on failure
+            # Range reads need OHLCV too; INCLUDE lets them be answered from the index alone.
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS candles_covering
+                ON candles (symbol, interval, open_time)
+                INCLUDE (close_time, open, high, low, close, volume)
+                """
+            )
+            # Try to enable TimescaleDB features if available; ignore on failure.
+            # A catalog lookup is enough once the extension is installed, so later
+            # processes skip the CREATE EXTENSION attempt.
             try:
-                cur.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+                cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+                if cur.fetchone() is None:
+                    cur.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
                 cur.execute("SELECT create_hypertable('candles', 'open_time', if_not_exists => TRUE)")
             except Exception:
                 pass
 
 
+_INIT_LOCK = threading.Lock()
+_initialized = False
+
+
+def ensure_initialized() -> None:
+    """Run init_db once per process, on first use rather than at import."""
+    global _initialized
+    if _initialized:
+        return
+    with _INIT_LOCK:
+        if not _initialized:
+            init_db()
+            _initialized = True
+
+
+_CANDLE_KEYS = ("time", "close_time", "open", "high", "low", "close", "volume")
+_CANDLE_COLUMNS = "symbol, interval, open_time, close_time, open, high, low, close, volume"
+_ON_CONFLICT_UPDATE = """
+    ON CONFLICT (symbol, interval, open_time) DO UPDATE SET
+        close_time = EXCLUDED.close_time,
+        open = EXCLUDED.open,
+        high = EXCLUDED.high,
+        low = EXCLUDED.low,
+        close = EXCLUDED.close,
+        volume = EXCLUDED.volume
+"""
+_UPSERT_CANDLES = f"INSERT INTO candles ({_CANDLE_COLUMNS}) VALUES %s {_ON_CONFLICT_UPDATE}"
+# Rows per round-trip when streaming an unbounded fetch_candles range.
+STREAM_ITERSIZE = 5000
+# Above this many rows a backfill goes through COPY + staging table instead of INSERT ... VALUES.
+COPY_THRESHOLD = 10_000
+
+
 def save_candles(symbol: str, interval: str, candles: Iterable[dict]) -> None:
     step = INTERVAL_SECONDS[interval]
     upper_symbol = symbol.upper()
@@ -85,22 +166,32 @@ def save_candles(symbol: str, interval: str, candles: Iterable[dict]) -> None:
 
     with _connect() as conn:
         with conn.cursor() as cur:
-            execute_values(
-                cur,
-                """
-                INSERT INTO candles (
-                    symbol, interval, open_time, close_time, open, high, low, close, volume
-                ) VALUES %s
-                ON CONFLICT (symbol, interval, open_time) DO UPDATE SET
-                    close_time = EXCLUDED.close_time,
-                    open = EXCLUDED.open,
-                    high = EXCLUDED.high,
-                    low = EXCLUDED.low,
-                    close = EXCLUDED.close,
-                    volume = EXCLUDED.volume
-                """,
-                rows,
-            )
+            if len(rows) > COPY_THRESHOLD:
+                _copy_upsert(cur, rows)
+            else:
+                execute_values(cur, _UPSERT_CANDLES, rows, page_size=1000)
+
+
+def _copy_upsert(cur, rows: List[tuple]) -> None:
+    """COPY large backfills into a temp staging table, then upsert them in one statement."""
+    buf = io.StringIO()
+    buf.writelines("\t".join(map(str, row)) + "\n" for row in rows)
+    buf.seek(0)
+    cur.execute("BEGIN")
+    try:
+        cur.execute("CREATE TEMP TABLE candles_staging (LIKE candles) ON COMMIT DROP")
+        cur.copy_expert(f"COPY candles_staging ({_CANDLE_COLUMNS}) FROM STDIN", buf)
+        cur.execute(
+            f"""
+            INSERT INTO candles ({_CANDLE_COLUMNS})
+            SELECT {_CANDLE_COLUMNS} FROM candles_staging
+            {_ON_CONFLICT_UPDATE}
+            """
+        )
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    cur.execute("COMMIT")
 
 
 def fetch_candles(
@@ -130,37 +221,26 @@ def fetch_candles(
         query += " LIMIT %s"
         params.append(int(limit))
 
+    # BIGINT / DOUBLE PRECISION already arrive as int / float, and save_candles rejects
+    # in-progress candles, so each tuple maps straight onto the payload keys.
+    keys = _CANDLE_KEYS
     with _connect() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query, params)
-            rows = cur.fetchall()
-
-    candles: List[dict] = []
-    for row in rows:
-        candles.append(
-            {
-                "time": int(row["time"]),
-                "close_time": int(row["close_time"]),
-                "open": float(row["open"]),
-                "high": float(row["high"]),
-                "low": float(row["low"]),
-                "close": float(row["close"]),
-                "volume": float(row["volume"]),
-            }
-        )
-
-    if not candles:
-        return candles
-
-    # Ensure only complete candles are returned, except possibly last one
-    step = INTERVAL_SECONDS[interval]
-    min_span = step - 1
-    filtered: List[dict] = []
-    for idx, c in enumerate(candles):
-        complete = c["close_time"] >= c["time"] + min_span
-        if complete or idx == len(candles) - 1:
-            filtered.append(c)
-    return filtered
+        if limit is not None:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                return [dict(zip(keys, row)) for row in cur.fetchall()]
+
+        # Unbounded ranges stream through a server-side cursor, so only STREAM_ITERSIZE
+        # raw rows are held alongside the dicts being built. Named cursors need a
+        # transaction; the pool restores autocommit on the next checkout.
+        conn.autocommit = False
+        try:
+            with conn.cursor(name="candles_stream") as cur:
+                cur.itersize = STREAM_ITERSIZE
+                cur.execute(query, params)
+                return [dict(zip(keys, row)) for row in cur]
+        finally:
+            conn.rollback()
 
 
 def fetch_after(symbol: str, interval: str, after_ts: int) -> List[dict]:
@@ -170,19 +250,8 @@ def fetch_after(symbol: str, interval: str, after_ts: int) -> List[dict]:
 
 
 def get_latest_open_time(symbol: str, interval: str) -> Optional[int]:
-    with _connect() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT open_time FROM candles
-                WHERE symbol = %s AND interval = %s
-                ORDER BY open_time DESC
-                LIMIT 1
-                """,
-                (symbol.upper(), interval),
-            )
-            row = cur.fetchone()
-            return int(row[0]) if row else None
+    # Same aggregate as get_time_range, so both share one prepared query shape.
+    return get_time_range(symbol, interval)[1]
 
 
 def get_time_range(symbol: str, interval: str) -> Tuple[Optional[int], Optional[int]]:
@@ -206,19 +275,20 @@ def get_time_range(symbol: str, interval: str) -> Tuple[Optional[int], Optional[
             )
 
 
-def _fetch_open_times(symbol: str, interval: str, start_ts: int, end_ts: int) -> List[Tuple[int, int]]:
-    with _connect() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT open_time, close_time FROM candles
-                WHERE symbol = %s AND interval = %s AND open_time BETWEEN %s AND %s
-                ORDER BY open_time ASC
-                """,
-                (symbol.upper(), interval, int(start_ts), int(end_ts)),
-            )
-            rows = cur.fetchall()
-            return [(int(r[0]), int(r[1])) for r in rows]
+# First row in the range that ends a gap or is itself incomplete; LAG keeps the walk
+# server-side (and inside the chunks Timescale selects for the range).
+_FIRST_GAP_QUERY = """
+    WITH ordered AS (
+        SELECT open_time, close_time, LAG(open_time) OVER (ORDER BY open_time) AS prev_time
+        FROM candles
+        WHERE symbol = %s AND interval = %s AND open_time BETWEEN %s AND %s
+    )
+    SELECT open_time, close_time, prev_time FROM ordered
+    WHERE open_time >= COALESCE(prev_time + %s, %s) + %s
+       OR (close_time < open_time + %s AND open_time < %s)
+    ORDER BY open_time ASC
+    LIMIT 1
+"""
 
 
 def find_missing_segment(symbol: str, interval: str, start_ts: int, end_ts: int) -> Optional[Tuple[int, int]]:
@@ -226,19 +296,33 @@ def find_missing_segment(symbol: str, interval: str, start_ts: int, end_ts: int)
         return None
 
     step = INTERVAL_SECONDS[interval]
-    expected = start_ts
-    open_times = _fetch_open_times(symbol, interval, start_ts, end_ts)
-
-    for open_time, close_time in open_times:
-        if open_time > expected:
-            missing_end = min(open_time - step, end_ts)
-            if missing_end >= expected:
-                return expected, missing_end
-        min_required_close = open_time + step - 1
-        if close_time < min_required_close and open_time < end_ts:
-            return open_time, min(open_time, end_ts)
-        expected = open_time + step
+    upper_symbol = symbol.upper()
+    start_ts, end_ts = int(start_ts), int(end_ts)
+    with _connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                _FIRST_GAP_QUERY,
+                (upper_symbol, interval, start_ts, end_ts, step, start_ts, step, step - 1, end_ts),
+            )
+            row = cur.fetchone()
+            if row is None:
+                cur.execute(
+                    """
+                    SELECT MAX(open_time) FROM candles
+                    WHERE symbol = %s AND interval = %s AND open_time BETWEEN %s AND %s
+                    """,
+                    (upper_symbol, interval, start_ts, end_ts),
+                )
+                (last_open,) = cur.fetchone()
+
+    if row is not None:
+        open_time, close_time, prev_time = (None if v is None else int(v) for v in row)
+        expected = start_ts if prev_time is None else prev_time + step
+        if open_time >= expected + step:
+            return expected, min(open_time - step, end_ts)
+        return open_time, min(open_time, end_ts)
 
+    expected = start_ts if last_open is None else int(last_open) + step
     if expected <= end_ts:
         return expected, end_ts
     return None
@@ -260,7 +344,3 @@ def delete_after(symbol: str, interval: str, cutoff_ts: int) -> None:
                 "DELETE FROM candles WHERE symbol = %s AND interval = %s AND open_time >= %s",
                 (symbol.upper(), interval, int(cutoff_ts)),
             )
-
-
-# Initialize DB on import, matching previous behavior
-init_db()
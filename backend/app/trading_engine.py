@@ -1,20 +1,38 @@
 """Trading engine core logic."""
 
-import uuid
-from datetime import datetime
-from typing import Optional, Tuple, List
+import logging
+from array import array
+from contextlib import contextmanager
+from operator import attrgetter
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional, Tuple, List
 import math
+import threading
+import time
 
 from .trading_models import Account, Order, Position, Trade, ClosedPosition, AccountStats
 from .events_bus import dispatch as dispatch_event
+from .ids import new_id
 from .trading_storage import (
-    save_account, save_order, save_trade, save_account_stats, 
-    get_account_stats
+    save_account, save_fills, save_order, save_account_stats,
+    get_account_stats, evict_account
 )
 
 
+logger = logging.getLogger(__name__)
+
 COMMISSION_RATE = 0.001  # 0.1% commission
 QUANTITY_EPSILON = 1e-10  # 用于处理浮点数精度问题的最小数量阈值
+PROFIT_LOSS = attrgetter("profit_loss")
+
+
+def _locked(method: Callable) -> Callable:
+    """引擎入口：持有账户锁执行，请求线程和 TP/SL 线程不会交错修改同一账户"""
+    @wraps(method)
+    def wrapper(self: "TradingEngine", *args, **kwargs):
+        with self.account.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class TradingEngine:
@@ -23,7 +41,79 @@ class TradingEngine:
     def __init__(self, account_id: int, account: Account):
         self.account_id = account_id
         self.account = account
+        self._stats: Optional[AccountStats] = None
+        self._stats_source: Optional[List[ClosedPosition]] = None
+        self._stats_key: Optional[Tuple[int, float]] = None
+        # 已折叠进 _fold_totals 的平仓记录前缀：(盈利和, 亏损和, 盈利数, 亏损数, 累计盈亏, 峰值, 最大回撤)
+        self._fold_source: Optional[List[ClosedPosition]] = None
+        self._fold_count = 0
+        self._fold_last: Optional[ClosedPosition] = None
+        self._fold_totals: Tuple[float, float, int, int, float, float, float] = (0.0, 0.0, 0, 0, 0.0, 0.0, 0.0)
+        # 同一前缀的 profit_loss 连续存放（8 字节/条），夏普比率直接在上面计算
+        self._fold_pnl = array("d")
+        # batch() 嵌套深度；批处理期间成交的订单/成交记录/账户只在最外层退出时写库一次
+        self._batch_depth = 0
+        self._batch_now: Optional[int] = None
+        self._dirty_orders: Dict[str, Order] = {}
+        self._pending_trades: List[Trade] = []
+        # 按品种索引的挂单，行情推进时只遍历该品种的挂单
+        self._open_by_symbol: Dict[str, List[Order]] = {}
+        for order in account.orders:
+            if order.status == "open":
+                self._open_by_symbol.setdefault(order.symbol, []).append(order)
+        # 每个品种挂单的 (最高买入限价, 最低卖出限价)；K线没有触及时直接跳过遍历，挂单变化时失效
+        self._fill_bounds: Dict[str, Tuple[float, float]] = {}
+    
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """合并一次行情推进中的多笔成交：订单、成交记录、账户一次事务写库，账户事件只推送一次"""
+        # 整个批次持有账户锁：其他线程的下单不会混进本批次的时间戳和延迟写库
+        with self.account.lock:
+            if self._batch_depth == 0:
+                # 同一批次内创建的订单、成交、仓位共用一个时间戳
+                self._batch_now = int(time.time())
+            self._batch_depth += 1
+            try:
+                yield
+            except BaseException:
+                if self._batch_depth == 1 and self._dirty_orders:
+                    # 批次中途出错：已成交的部分不写库，丢弃缓存的账户，下次从数据库重新加载
+                    self._dirty_orders = {}
+                    self._pending_trades = []
+                    self._invalidate()
+                raise
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._batch_now = None
+            # 只在正常退出最外层批次时写库
+            if self._batch_depth == 0 and self._dirty_orders:
+                orders = list(self._dirty_orders.values())
+                trades = self._pending_trades
+                self._dirty_orders = {}
+                self._pending_trades = []
+                self._persist_fills(orders, trades)
+    
+    def _now(self) -> int:
+        now = self._batch_now
+        return int(time.time()) if now is None else now
+    
+    def _invalidate(self) -> None:
+        """内存中的账户与数据库不一致时丢弃缓存的账户和引擎"""
+        evict_account(self.account.mode, self.account.symbol)
+        discard_trading_engine(self.account_id)
+    
+    def _persist_fills(self, orders: List[Order], trades: List[Trade]) -> None:
+        try:
+            save_fills(self.account_id, self.account, orders, trades)
+        except Exception:
+            # 账户已包含这些成交但数据库没有，不能让之后的写入把它当成正确状态保存
+            self._invalidate()
+            raise
+        positions_value = sum(abs(pos.quantity) * pos.entry_price for pos in self.account.positions)
+        dispatch_event(self.account_id, {"type": "account", "balance": self.account.balance, "positions_value": positions_value})
     
+    @_locked
     def place_market_order(self, symbol: str, direction: str, quantity: float, current_price: float) -> Order:
         """
         下达市价单
@@ -66,21 +156,23 @@ class TradingEngine:
         
         # 创建订单
         order = Order(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             symbol=symbol,
             direction=direction,
             type="market",
             quantity=quantity,
             price=current_price,
-            create_time=int(datetime.utcnow().timestamp())
+            create_time=self._now()
         )
         
         # 市价单立即成交
+        self.account.add_order(order)
         self._fill_order(order, current_price)
         # Broadcast market order fill
         dispatch_event(self.account_id, {"type": "order", "order_id": order.id, "status": "filled"})
         return order
     
+    @_locked
     def place_limit_order(self, symbol: str, direction: str, quantity: float, limit_price: float) -> Order:
         """
         下达限价单
@@ -117,21 +209,24 @@ class TradingEngine:
         
         # 创建订单
         order = Order(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             symbol=symbol,
             direction=direction,
             type="limit",
             quantity=quantity,
             price=limit_price,
-            create_time=int(datetime.utcnow().timestamp())
+            create_time=self._now()
         )
         
         # 添加到订单列表
-        self.account.orders.append(order)
+        self.account.add_order(order)
+        self._open_by_symbol.setdefault(symbol, []).append(order)
+        self._fill_bounds.pop(symbol, None)
         save_order(self.account_id, order)
         
         return order
     
+    @_locked
     def try_fill_limit_orders(self, symbol: str, current_price: float, high: Optional[float] = None, low: Optional[float] = None) -> List[Order]:
         """
         尝试成交限价单
@@ -146,41 +241,63 @@ class TradingEngine:
             List[Order]: 成交的订单列表
         """
         filled_orders = []
-        
-        for order in self.account.orders[:]:
-            if order.status != "open" or order.symbol != symbol:
-                continue
-            
-            should_fill = False
-            fill_price = current_price
-            
-            # 买入限价单：如果有最低价，检查最低价是否触及限价；否则用当前价
-            if order.direction == "buy":
-                if low is not None and low <= order.price:
-                    should_fill = True
-                    # 成交价为限价和最低价中的较高者（更接近真实情况）
+        open_orders = self._open_by_symbol.get(symbol)
+        if not open_orders:
+            return filled_orders
+        
+        bounds = self._fill_bounds.get(symbol)
+        if bounds is None:
+            bounds = self._fill_bounds[symbol] = self._limit_price_bounds(open_orders)
+        max_buy, min_sell = bounds
+        buy_probe = current_price if low is None else low
+        sell_probe = current_price if high is None else high
+        if buy_probe > max_buy and sell_probe < min_sell:
+            return filled_orders
+        
+        with self.batch():
+            for order in open_orders:
+                if order.status != "open":
+                    continue
+                
+                # 有高低价时用高低价判断触及，否则用当前价（探针已在循环外选好）；
+                # 无高低价时触及即意味着当前价在限价内，所以成交价统一为限价与当前价中更优者
+                if order.direction == "buy":
+                    if buy_probe > order.price:
+                        continue
                     fill_price = min(order.price, current_price)
-                elif low is None and current_price <= order.price:
-                    should_fill = True
-                    fill_price = current_price
-            
-            # 卖出限价单：如果有最高价，检查最高价是否触及限价；否则用当前价
-            elif order.direction == "sell":
-                if high is not None and high >= order.price:
-                    should_fill = True
-                    # 成交价为限价和最高价中的较低者（更接近真实情况）
+                elif order.direction == "sell":
+                    if sell_probe < order.price:
+                        continue
                     fill_price = max(order.price, current_price)
-                elif high is None and current_price >= order.price:
-                    should_fill = True
-                    fill_price = current_price
-            
-            if should_fill:
+                else:
+                    continue
+                
                 self._fill_order(order, fill_price)
                 filled_orders.append(order)
                 dispatch_event(self.account_id, {"type": "order", "order_id": order.id, "status": order.status})
         
+        if filled_orders:
+            # 成交的订单统一在遍历后移出索引，避免逐个 list.remove
+            self._open_by_symbol[symbol] = [order for order in open_orders if order.status == "open"]
+            self._fill_bounds.pop(symbol, None)
+        
         return filled_orders
     
+    @staticmethod
+    def _limit_price_bounds(open_orders: List[Order]) -> Tuple[float, float]:
+        max_buy = -math.inf
+        min_sell = math.inf
+        for order in open_orders:
+            if order.status != "open":
+                continue
+            if order.direction == "buy":
+                if order.price > max_buy:
+                    max_buy = order.price
+            elif order.direction == "sell":
+                if order.price < min_sell:
+                    min_sell = order.price
+        return max_buy, min_sell
+    
     def _fill_order(self, order: Order, fill_price: float) -> None:
         """
         成交订单的内部方法
@@ -198,12 +315,12 @@ class TradingEngine:
         # 更新订单状态
         order.filled_quantity = order.quantity
         order.filled_price = fill_price
-        order.filled_time = int(datetime.utcnow().timestamp())
-        order.status = "filled"
+        order.filled_time = self._now()
+        self.account.set_order_status(order, "filled")
         
         # 创建成交记录
         trade = Trade(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             symbol=order.symbol,
             direction=order.direction,
             quantity=fill_qty,
@@ -211,8 +328,7 @@ class TradingEngine:
             timestamp=order.filled_time,
             commission=commission
         )
-        self.account.trades.append(trade)
-        save_trade(self.account_id, trade)
+        self.account.add_trade(trade)
         dispatch_event(self.account_id, {"type": "trade", "trade_id": trade.id, "symbol": trade.symbol, "price": trade.price, "qty": trade.quantity})
         
         # 更新仓位（会返回平仓盈亏）
@@ -226,11 +342,12 @@ class TradingEngine:
             # 开/加仓：扣除本次成交成本与手续费
             self.account.balance -= fill_qty * fill_price + commission
         
-        # 保存订单和账户
-        save_order(self.account_id, order)
-        save_account(self.account_id, self.account)
-        positions_value = sum(abs(pos.quantity) * pos.entry_price for pos in self.account.positions)
-        dispatch_event(self.account_id, {"type": "account", "balance": self.account.balance, "positions_value": positions_value})
+        # 保存成交、订单和账户（批处理中则推迟到 batch() 退出时）
+        if self._batch_depth:
+            self._pending_trades.append(trade)
+            self._dirty_orders[order.id] = order
+        else:
+            self._persist_fills([order], [trade])
     
     def _update_position(self, symbol: str, direction: str, quantity: float, price: float) -> Optional[float]:
         """
@@ -254,9 +371,9 @@ class TradingEngine:
                 symbol=symbol,
                 quantity=qty,
                 entry_price=price,
-                entry_time=int(datetime.utcnow().timestamp())
+                entry_time=self._now()
             )
-            self.account.positions.append(pos)
+            self.account.add_position(pos)
             return None  # 开仓，没有盈亏
         else:
             # 更新现有仓位
@@ -290,22 +407,22 @@ class TradingEngine:
                     
                     # 创建已平仓持仓记录（profit_loss 不扣除手续费，手续费单独记录）
                     closed_pos = ClosedPosition(
-                        id=str(uuid.uuid4()),
+                        id=new_id(),
                         symbol=symbol,
                         direction="buy" if old_quantity > 0 else "sell",
                         quantity=closed_qty,
                         entry_price=old_entry_price,
                         entry_time=old_entry_time,
                         exit_price=price,
-                        exit_time=int(datetime.utcnow().timestamp()),
+                        exit_time=self._now(),
                         profit_loss=profit_loss,  # 纯价差盈亏
                         commission=commission
                     )
-                    self.account.closed_positions.append(closed_pos)
+                    self.account.add_closed_position(closed_pos)
                     dispatch_event(self.account_id, {"type": "closed_position", "id": closed_pos.id, "pnl": closed_pos.profit_loss, "symbol": closed_pos.symbol})
                     
                     # 从仓位列表中移除
-                    self.account.positions.remove(pos)
+                    self.account.remove_position(pos)
                     
                     # 平仓现金流入 = 本次成交金额（已在开仓时扣除成本）
                     return closed_qty * price
@@ -322,6 +439,7 @@ class TradingEngine:
                     pos.entry_price = total_cost / abs(pos.quantity)
                 return None  # 加仓，没有平仓盈亏
     
+    @_locked
     def cancel_order(self, order_id: str) -> bool:
         """
         取消订单
@@ -332,14 +450,19 @@ class TradingEngine:
         Returns:
             bool: 是否成功取消
         """
-        for order in self.account.orders:
-            if order.id == order_id and order.status == "open":
-                order.status = "cancelled"
-                save_order(self.account_id, order)
-                dispatch_event(self.account_id, {"type": "order", "order_id": order.id, "status": order.status})
-                return True
+        # 只有挂单可以撤销，所以只需查索引；重建列表而不是原地删除，不影响正在进行的遍历
+        for symbol, open_orders in self._open_by_symbol.items():
+            for order in open_orders:
+                if order.id == order_id and order.status == "open":
+                    self.account.set_order_status(order, "cancelled")
+                    self._open_by_symbol[symbol] = [o for o in open_orders if o is not order]
+                    self._fill_bounds.pop(symbol, None)
+                    save_order(self.account_id, order)
+                    dispatch_event(self.account_id, {"type": "order", "order_id": order.id, "status": order.status})
+                    return True
         return False
     
+    @_locked
     def set_position_tpsl(self, symbol: str, take_profit_price: Optional[float], stop_loss_price: Optional[float]) -> bool:
         """
         设置仓位的止盈止损价格
@@ -380,6 +503,7 @@ class TradingEngine:
         dispatch_event(self.account_id, {"type": "position", "symbol": symbol, "tp": take_profit_price, "sl": stop_loss_price})
         return True
     
+    @_locked
     def check_tpsl_triggers(self, symbol: str, current_price: float, high: Optional[float] = None, low: Optional[float] = None) -> List[Order]:
         """
         检查并触发止盈止损
@@ -426,12 +550,14 @@ class TradingEngine:
             # 触发平仓
             direction = "sell" if pos.quantity > 0 else "buy"
             quantity = abs(pos.quantity)
-            order = self.place_market_order(symbol, direction, quantity, close_price)
+            with self.batch():
+                order = self.place_market_order(symbol, direction, quantity, close_price)
             triggered_orders.append(order)
-            print(f"[TradingEngine] {reason}触发: {symbol} @ {close_price}, 平仓数量: {quantity}")
+            logger.info("[TradingEngine] %s触发: %s @ %s, 平仓数量: %s", reason, symbol, close_price, quantity)
         
         return triggered_orders
     
+    @_locked
     def calculate_stats(self) -> AccountStats:
         """
         计算账户统计数据，基于已平仓的完整交易
@@ -439,27 +565,30 @@ class TradingEngine:
         Returns:
             AccountStats: 统计数据
         """
+        closed_pos = self.account.closed_positions
+        initial_balance = self.account.initial_balance
+        # 平仓记录只追加不修改；列表、数量和初始资金都没变时直接复用上次结果
+        cache_key = (len(closed_pos), initial_balance)
+        if self._stats is not None and self._stats_source is closed_pos and self._stats_key == cache_key:
+            return self._stats
+        
         stats = AccountStats()
         
         # 如果没有已平仓的交易，返回默认统计
-        if not self.account.closed_positions:
+        if not closed_pos:
             save_account_stats(self.account_id, stats)
+            self._remember_stats(stats, closed_pos, cache_key)
             return stats
         
-        closed_pos = self.account.closed_positions
+        profits, losses, winning, losing, cumulative, peak, max_drawdown = self._fold_closed_positions(closed_pos)
         
         # 基本统计
         stats.total_trades = len(closed_pos)
-        stats.winning_trades = len([p for p in closed_pos if p.profit_loss > 0])
-        stats.losing_trades = len([p for p in closed_pos if p.profit_loss < 0])
-        
-        if stats.total_trades > 0:
-            stats.win_rate = stats.winning_trades / stats.total_trades
+        stats.winning_trades = winning
+        stats.losing_trades = losing
+        stats.win_rate = winning / stats.total_trades
         
         # 计算盈利因子
-        profits = sum(p.profit_loss for p in closed_pos if p.profit_loss > 0)
-        losses = abs(sum(p.profit_loss for p in closed_pos if p.profit_loss < 0))
-        
         stats.total_profit = profits
         stats.total_loss = losses
         
@@ -467,61 +596,85 @@ class TradingEngine:
             stats.profit_factor = profits / losses
         
         # 计算期望值
-        if stats.total_trades > 0:
-            avg_profit = profits / stats.winning_trades if stats.winning_trades > 0 else 0
-            avg_loss = losses / stats.losing_trades if stats.losing_trades > 0 else 0
-            stats.expectancy = (stats.win_rate * avg_profit) - ((1 - stats.win_rate) * avg_loss)
+        avg_profit = profits / winning if winning > 0 else 0
+        avg_loss = losses / losing if losing > 0 else 0
+        stats.expectancy = (stats.win_rate * avg_profit) - ((1 - stats.win_rate) * avg_loss)
         
         # 计算累计收益和总回报
-        total_pnl = sum(p.profit_loss for p in closed_pos)
-        stats.total_return = total_pnl
-        stats.cumulative_return = total_pnl / self.account.initial_balance if self.account.initial_balance > 0 else 0
+        stats.total_return = cumulative
+        stats.cumulative_return = cumulative / initial_balance if initial_balance > 0 else 0
         
         # 计算最大回撤
-        stats.max_drawdown, stats.max_drawdown_pct = self._calculate_max_drawdown_from_closed_positions()
+        stats.max_drawdown = max_drawdown
+        stats.max_drawdown_pct = (max_drawdown / initial_balance * 100) if initial_balance > 0 else 0
         
         # 计算夏普比率和CAGR
-        stats.sharpe_ratio = self._calculate_sharpe_ratio_from_closed_positions()
-        stats.cagr = self._calculate_cagr_from_closed_positions()
+        stats.sharpe_ratio = self._calculate_sharpe_ratio_from_closed_positions(self._fold_pnl)
+        stats.cagr = self._calculate_cagr_from_closed_positions(cumulative)
         
         save_account_stats(self.account_id, stats)
+        self._remember_stats(stats, closed_pos, cache_key)
         return stats
     
-    def _calculate_max_drawdown_from_closed_positions(self) -> Tuple[float, float]:
+    def _fold_closed_positions(self, closed_pos: List[ClosedPosition]) -> Tuple[float, float, int, int, float, float, float]:
         """
-        从已平仓持仓计算最大回撤
+        累计盈亏汇总和最大回撤（closed_positions 按 exit_time 有序）
         
-        Returns:
-            Tuple[float, float]: (最大回撤额, 最大回撤%)
+        平仓记录通常只在末尾追加，此时只折叠新增部分；如果列表被替换或中间插入了记录，则从头重算
         """
-        if not self.account.closed_positions:
-            return 0.0, 0.0
-        
-        cumulative = 0
-        peak = 0
-        max_drawdown = 0
-        
-        for pos in sorted(self.account.closed_positions, key=lambda p: p.exit_time):
-            cumulative += pos.profit_loss
-            peak = max(peak, cumulative)
-            drawdown = peak - cumulative
-            max_drawdown = max(max_drawdown, drawdown)
-        
-        max_drawdown_pct = (max_drawdown / self.account.initial_balance * 100) if self.account.initial_balance > 0 else 0
-        
-        return max_drawdown, max_drawdown_pct
+        count = self._fold_count
+        if (
+            self._fold_source is not closed_pos
+            or count > len(closed_pos)
+            or (count and closed_pos[count - 1] is not self._fold_last)
+        ):
+            count = 0
+            self._fold_totals = (0.0, 0.0, 0, 0, 0.0, 0.0, 0.0)
+            self._fold_pnl = array("d")
+        
+        profits, losses, winning, losing, cumulative, peak, max_drawdown = self._fold_totals
+        pnl_values = self._fold_pnl
+        pnl_values.extend(map(PROFIT_LOSS, closed_pos[count:]))
+        for pnl in pnl_values[count:]:
+            if pnl > 0:
+                winning += 1
+                profits += pnl
+            elif pnl < 0:
+                losing += 1
+                losses -= pnl
+            cumulative += pnl
+            if cumulative > peak:
+                peak = cumulative
+            elif peak - cumulative > max_drawdown:
+                max_drawdown = peak - cumulative
+        
+        totals = (profits, losses, winning, losing, cumulative, peak, max_drawdown)
+        self._fold_totals = totals
+        self._fold_source = closed_pos
+        self._fold_count = len(closed_pos)
+        self._fold_last = closed_pos[-1] if closed_pos else None
+        return totals
     
-    def _calculate_sharpe_ratio_from_closed_positions(self) -> float:
+    def _remember_stats(self, stats: AccountStats, closed_pos: List[ClosedPosition], cache_key: Tuple[int, float]) -> None:
+        self._stats = stats
+        self._stats_source = closed_pos
+        self._stats_key = cache_key
+    
+    def _calculate_sharpe_ratio_from_closed_positions(self, pnl_values: "array[float]") -> float:
         """
         从已平仓持仓计算夏普比率
         
+        Args:
+            pnl_values: 按顺序排列的每笔平仓盈亏
+        
         Returns:
             float: 夏普比率
         """
-        if len(self.account.closed_positions) < 2:
+        if len(pnl_values) < 2:
             return 0.0
         
-        returns = [p.profit_loss / self.account.initial_balance for p in self.account.closed_positions]
+        initial_balance = self.account.initial_balance
+        returns = [pnl / initial_balance for pnl in pnl_values]
         
         mean_return = sum(returns) / len(returns)
         variance = sum((r - mean_return) ** 2 for r in returns) / len(returns)
@@ -541,24 +694,27 @@ class TradingEngine:
         
         return sharpe_ratio
     
-    def _calculate_cagr_from_closed_positions(self) -> float:
+    def _calculate_cagr_from_closed_positions(self, total_return: float) -> float:
         """
         从已平仓持仓计算年化收益率 (CAGR)
         
+        Args:
+            total_return: 已平仓总盈亏
+        
         Returns:
             float: CAGR
         """
         if not self.account.closed_positions:
             return 0.0
         
-        first_exit = min(p.exit_time for p in self.account.closed_positions)
-        last_exit = max(p.exit_time for p in self.account.closed_positions)
+        # closed_positions 按 exit_time 有序
+        first_exit = self.account.closed_positions[0].exit_time
+        last_exit = self.account.closed_positions[-1].exit_time
         
         years = (last_exit - first_exit) / (365.25 * 86400)
         if years <= 0:
             return 0.0
         
-        total_return = sum(p.profit_loss for p in self.account.closed_positions)
         end_value = self.account.initial_balance + total_return
         
         if self.account.initial_balance <= 0 or end_value <= 0:
@@ -578,6 +734,24 @@ class TradingEngine:
             return 0.0
 
 
+# One engine per account id; rebuilt when the cached Account object is replaced.
+_ENGINES: Dict[int, TradingEngine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
 def get_trading_engine(account_id: int, account: Account) -> TradingEngine:
     """Get a trading engine instance."""
-    return TradingEngine(account_id, account)
+    engine = _ENGINES.get(account_id)
+    if engine is not None and engine.account is account:
+        return engine
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(account_id)
+        if engine is None or engine.account is not account:
+            engine = _ENGINES[account_id] = TradingEngine(account_id, account)
+    return engine
+
+
+def discard_trading_engine(account_id: int) -> None:
+    """Drop the cached engine, e.g. after the account's lists were cleared in place."""
+    with _ENGINES_LOCK:
+        _ENGINES.pop(account_id, None)
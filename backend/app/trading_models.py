@@ -1,8 +1,26 @@
 """Trading system data models."""
 
+from bisect import insort
 from dataclasses import dataclass, field
-from typing import Optional, List
-from datetime import datetime
+from operator import attrgetter
+import threading
+from typing import Any, Callable, Dict, Optional, List
+import time
+
+
+# API payload fields. to_dict() builds the payload once per object and reuses it.
+ORDER_FIELDS = (
+    "id", "symbol", "direction", "type", "quantity", "price",
+    "create_time", "filled_quantity", "filled_price", "status",
+)
+TRADE_FIELDS = ("id", "symbol", "direction", "quantity", "price", "timestamp", "commission")
+CLOSED_POSITION_FIELDS = (
+    "id", "symbol", "direction", "quantity", "entry_price", "entry_time",
+    "exit_price", "exit_time", "profit_loss", "commission",
+)
+_order_values = attrgetter(*ORDER_FIELDS)
+_trade_values = attrgetter(*TRADE_FIELDS)
+_closed_position_values = attrgetter(*CLOSED_POSITION_FIELDS)
 
 
 @dataclass
@@ -39,6 +57,19 @@ class Order:
     filled_quantity: float = 0.0
     filled_price: Optional[float] = None
     status: str = "open"  # "open", "filled", "cancelled"
+    _dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        # 订单会被成交/撤销修改，任何字段变化都让缓存的 payload 失效
+        object.__setattr__(self, name, value)
+        if name != "_dict":
+            object.__setattr__(self, "_dict", None)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        payload = self._dict
+        if payload is None:
+            payload = self._dict = dict(zip(ORDER_FIELDS, _order_values(self)))
+        return payload
     
     def is_open(self) -> bool:
         return self.status == "open"
@@ -57,6 +88,14 @@ class Trade:
     price: float
     timestamp: int
     commission: float = 0.0
+    _dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        # 成交记录创建后不再修改
+        payload = self._dict
+        if payload is None:
+            payload = self._dict = dict(zip(TRADE_FIELDS, _trade_values(self)))
+        return payload
 
 
 @dataclass
@@ -72,6 +111,17 @@ class ClosedPosition:
     exit_time: int
     profit_loss: float  # 平仓的盈亏（包括手续费）
     commission: float = 0.0
+    _dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        # 平仓记录创建后不再修改
+        payload = self._dict
+        if payload is None:
+            payload = dict(zip(CLOSED_POSITION_FIELDS, _closed_position_values(self)))
+            payload["days_held"] = self.days_held()
+            payload["return_pct"] = self.return_pct()
+            self._dict = payload
+        return payload
     
     def days_held(self) -> float:
         """持仓天数"""
@@ -89,6 +139,19 @@ class ClosedPosition:
         return (self.profit_loss / cost) * 100
 
 
+ORDER_TIME = attrgetter("create_time")
+TRADE_TIME = attrgetter("timestamp")
+CLOSED_POSITION_TIME = attrgetter("exit_time")
+
+
+def _append_by_time(items: List[Any], item: Any, key: Callable[[Any], int]) -> None:
+    """Append keeping ``items`` oldest-first; timestamps are almost always monotonic."""
+    if not items or key(items[-1]) <= key(item):
+        items.append(item)
+    else:
+        insort(items, item, key=key)
+
+
 @dataclass
 class Account:
     """账户"""
@@ -101,15 +164,82 @@ class Account:
     orders: List[Order] = field(default_factory=list)
     trades: List[Trade] = field(default_factory=list)
     closed_positions: List[ClosedPosition] = field(default_factory=list)
-    created_time: int = field(default_factory=lambda: int(datetime.utcnow().timestamp()))
-    last_update_time: int = field(default_factory=lambda: int(datetime.utcnow().timestamp()))
+    created_time: int = field(default_factory=lambda: int(time.time()))
+    last_update_time: int = field(default_factory=lambda: int(time.time()))
+    # symbol -> Position，与 positions 同步；增删仓位请走 add/remove/clear_positions
+    _positions_by_symbol: Dict[str, Position] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # symbol -> 挂单（status == "open"）数量；订单状态变更请走 add_order/set_order_status/clear_orders
+    _open_order_counts: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # 同一账户被请求线程和 TP/SL 线程共享；引擎入口和重置都持有此锁（可重入：止盈止损内部会下市价单）
+    lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        for pos in self.positions:
+            self._positions_by_symbol.setdefault(pos.symbol, pos)
+        for order in self.orders:
+            if order.status == "open":
+                self._count_open_order(order.symbol, 1)
+    
+    # orders / trades / closed_positions are kept sorted oldest-first by time,
+    # so newest-first pages are a reversed slice from the tail.
+    def add_order(self, order: Order) -> None:
+        _append_by_time(self.orders, order, ORDER_TIME)
+        if order.status == "open":
+            self._count_open_order(order.symbol, 1)
+    
+    def set_order_status(self, order: Order, status: str) -> None:
+        """更新订单状态，同步挂单计数"""
+        if order.status == "open" and status != "open":
+            self._count_open_order(order.symbol, -1)
+        elif order.status != "open" and status == "open":
+            self._count_open_order(order.symbol, 1)
+        order.status = status
+    
+    def clear_orders(self) -> None:
+        self.orders.clear()
+        self._open_order_counts.clear()
+    
+    def _count_open_order(self, symbol: str, delta: int) -> None:
+        count = self._open_order_counts.get(symbol, 0) + delta
+        if count > 0:
+            self._open_order_counts[symbol] = count
+        else:
+            self._open_order_counts.pop(symbol, None)
+    
+    def add_trade(self, trade: Trade) -> None:
+        _append_by_time(self.trades, trade, TRADE_TIME)
+    
+    def add_closed_position(self, closed_pos: ClosedPosition) -> None:
+        _append_by_time(self.closed_positions, closed_pos, CLOSED_POSITION_TIME)
     
     def get_position(self, symbol: str) -> Optional[Position]:
         """获取指定品种的仓位"""
-        for pos in self.positions:
-            if pos.symbol == symbol:
-                return pos
-        return None
+        return self._positions_by_symbol.get(symbol)
+    
+    def add_position(self, pos: Position) -> None:
+        self.positions.append(pos)
+        self._positions_by_symbol.setdefault(pos.symbol, pos)
+    
+    def remove_position(self, pos: Position) -> None:
+        self.positions.remove(pos)
+        if self._positions_by_symbol.get(pos.symbol) is pos:
+            del self._positions_by_symbol[pos.symbol]
+            # 理论上每个品种只有一个仓位；若有重复，让下一个顶上，与线性查找的结果一致
+            for other in self.positions:
+                if other.symbol == pos.symbol:
+                    self._positions_by_symbol[pos.symbol] = other
+                    break
+    
+    def clear_positions(self) -> None:
+        self.positions.clear()
+        self._positions_by_symbol.clear()
+    
+    def has_pending_triggers(self, symbol: str) -> bool:
+        """是否有需要随行情检查的止盈止损或挂单"""
+        pos = self.get_position(symbol)
+        if pos is not None and (pos.take_profit_price is not None or pos.stop_loss_price is not None):
+            return True
+        return symbol in self._open_order_counts
     
     def get_total_position_value(self, current_price: float) -> float:
         """获取当前仓位总价值"""
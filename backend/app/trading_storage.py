@@ -1,15 +1,31 @@
 """Trading system storage layer."""
 
+import itertools
 import sqlite3
 import json
+import threading
+import time
 from typing import Optional, List, Dict, Tuple
-from datetime import datetime
 
 from .config import DATA_DIR
 from .trading_models import Account, Order, Position, Trade, AccountStats
 
 DB_PATH = DATA_DIR / "trading.db"
 
+# Per-account counter taken from a global sequence on every write, so readers can
+# tell whether something derived from the stored state is still current.
+_VERSION_SEQ = itertools.count(1)
+_VERSIONS: Dict[int, int] = {}
+
+
+def _bump_version(account_id: int) -> None:
+    _VERSIONS[account_id] = next(_VERSION_SEQ)
+
+
+def get_account_version(account_id: int) -> int:
+    """Return a value that changes whenever the account's stored state does."""
+    return _VERSIONS.get(account_id, 0)
+
 
 def _connect() -> sqlite3.Connection:
     """Create database connection."""
@@ -149,8 +165,37 @@ def init_trading_db() -> None:
         conn.commit()
 
 
+# Accounts are unique per (mode, symbol), so every caller shares one live object per
+# key. The engine mutates it in place and persists each change, keeping it in sync.
+_ACCOUNTS: Dict[Tuple[str, str], Tuple[int, Account]] = {}
+_ACCOUNTS_LOCK = threading.Lock()
+
+
 def get_or_create_account(mode: str, symbol: str, interval: str, initial_balance: float = 10000.0) -> Tuple[int, Account]:
     """Get or create account. interval is kept for Account object but not used for DB lookup."""
+    key = (mode, symbol)
+    cached = _ACCOUNTS.get(key)
+    if cached is not None:
+        return cached
+    with _ACCOUNTS_LOCK:
+        cached = _ACCOUNTS.get(key)
+        if cached is None:
+            cached = _ACCOUNTS[key] = _get_or_create_account(mode, symbol, interval, initial_balance)
+    return cached
+
+
+def peek_account(mode: str, symbol: str) -> Optional[Tuple[int, Account]]:
+    """Return the cached account without touching the database, or None."""
+    return _ACCOUNTS.get((mode, symbol))
+
+
+def evict_account(mode: str, symbol: str) -> None:
+    """Drop the cached account so the next lookup reloads it from the database."""
+    with _ACCOUNTS_LOCK:
+        _ACCOUNTS.pop((mode, symbol), None)
+
+
+def _get_or_create_account(mode: str, symbol: str, interval: str, initial_balance: float) -> Tuple[int, Account]:
     with _connect() as conn:
         cursor = conn.execute(
             "SELECT id FROM accounts WHERE mode = ? AND symbol = ?",
@@ -160,11 +205,13 @@ def get_or_create_account(mode: str, symbol: str, interval: str, initial_balance
         
         if row:
             account_id = row["id"]
-            account = _load_account(account_id, interval)
+            # Load the account and prime its stats over this one connection.
+            account = _load_account(account_id, interval, conn)
+            _read_account_stats(conn, account_id)
             return account_id, account
         
         # Create new account
-        now = int(datetime.utcnow().timestamp())
+        now = int(time.time())
         cursor = conn.execute(
             """
             INSERT INTO accounts (mode, symbol, initial_balance, balance, created_time, last_update_time)
@@ -181,6 +228,8 @@ def get_or_create_account(mode: str, symbol: str, interval: str, initial_balance
             (account_id,)
         )
         conn.commit()
+        # Column defaults match AccountStats(), so no read-back is needed.
+        _STATS[account_id] = AccountStats()
         
         account = Account(
             mode=mode,
@@ -194,132 +243,148 @@ def get_or_create_account(mode: str, symbol: str, interval: str, initial_balance
         return account_id, account
 
 
-def _load_account(account_id: int, interval: str = "") -> Account:
-    """Load account from database."""
-    with _connect() as conn:
-        cursor = conn.execute("SELECT * FROM accounts WHERE id = ?", (account_id,))
-        row = cursor.fetchone()
-        if not row:
-            raise ValueError(f"Account {account_id} not found")
-        
-        account = Account(
-            mode=row["mode"],
+def _load_account(account_id: int, interval: str = "", conn: Optional[sqlite3.Connection] = None) -> Account:
+    """Load account from database, reusing ``conn`` when the caller has one open."""
+    if conn is None:
+        with _connect() as conn:
+            return _load_account(account_id, interval, conn)
+    cursor = conn.execute("SELECT * FROM accounts WHERE id = ?", (account_id,))
+    row = cursor.fetchone()
+    if not row:
+        raise ValueError(f"Account {account_id} not found")
+    
+    account = Account(
+        mode=row["mode"],
+        symbol=row["symbol"],
+        interval=interval,  # Passed as parameter, not stored in DB
+        initial_balance=row["initial_balance"],
+        balance=row["balance"],
+        created_time=row["created_time"],
+        last_update_time=row["last_update_time"]
+    )
+    
+    # Load positions
+    cursor = conn.execute("SELECT * FROM positions WHERE account_id = ?", (account_id,))
+    for row in cursor:
+        keys = set(row.keys())
+        pos = Position(
             symbol=row["symbol"],
-            interval=interval,  # Passed as parameter, not stored in DB
-            initial_balance=row["initial_balance"],
-            balance=row["balance"],
-            created_time=row["created_time"],
-            last_update_time=row["last_update_time"]
+            quantity=row["quantity"],
+            entry_price=row["entry_price"],
+            entry_time=row["entry_time"],
+            take_profit_price=row["take_profit_price"] if "take_profit_price" in keys else None,
+            stop_loss_price=row["stop_loss_price"] if "stop_loss_price" in keys else None,
         )
-        
-        # Load positions
-        cursor = conn.execute("SELECT * FROM positions WHERE account_id = ?", (account_id,))
-        for row in cursor:
-            keys = set(row.keys())
-            pos = Position(
-                symbol=row["symbol"],
-                quantity=row["quantity"],
-                entry_price=row["entry_price"],
-                entry_time=row["entry_time"],
-                take_profit_price=row["take_profit_price"] if "take_profit_price" in keys else None,
-                stop_loss_price=row["stop_loss_price"] if "stop_loss_price" in keys else None,
-            )
-            account.positions.append(pos)
-        
-        # Load orders
-        cursor = conn.execute("SELECT * FROM orders WHERE account_id = ?", (account_id,))
-        for row in cursor:
-            order = Order(
-                id=row["id"],
-                symbol=row["symbol"],
-                direction=row["direction"],
-                type=row["type"],
-                quantity=row["quantity"],
-                price=row["price"],
-                create_time=row["create_time"],
-                filled_time=row["filled_time"],
-                filled_quantity=row["filled_quantity"],
-                filled_price=row["filled_price"],
-                status=row["status"]
-            )
-            account.orders.append(order)
-        
-        # Load trades
-        cursor = conn.execute("SELECT * FROM trades WHERE account_id = ?", (account_id,))
-        for row in cursor:
-            trade = Trade(
-                id=row["id"],
-                symbol=row["symbol"],
-                direction=row["direction"],
-                quantity=row["quantity"],
-                price=row["price"],
-                timestamp=row["timestamp"],
-                commission=row["commission"]
-            )
-            account.trades.append(trade)
-        
-        # Load closed positions
-        cursor = conn.execute("SELECT * FROM closed_positions WHERE account_id = ?", (account_id,))
-        for row in cursor:
-            from .trading_models import ClosedPosition
-            closed_pos = ClosedPosition(
-                id=row["id"],
-                symbol=row["symbol"],
-                direction=row["direction"],
-                quantity=row["quantity"],
-                entry_price=row["entry_price"],
-                entry_time=row["entry_time"],
-                exit_price=row["exit_price"],
-                exit_time=row["exit_time"],
-                profit_loss=row["profit_loss"],
-                commission=row["commission"]
-            )
-            account.closed_positions.append(closed_pos)
-        
-        return account
+        account.add_position(pos)
+    
+    # Load orders
+    cursor = conn.execute("SELECT * FROM orders WHERE account_id = ? ORDER BY create_time, rowid", (account_id,))
+    for row in cursor:
+        order = Order(
+            id=row["id"],
+            symbol=row["symbol"],
+            direction=row["direction"],
+            type=row["type"],
+            quantity=row["quantity"],
+            price=row["price"],
+            create_time=row["create_time"],
+            filled_time=row["filled_time"],
+            filled_quantity=row["filled_quantity"],
+            filled_price=row["filled_price"],
+            status=row["status"]
+        )
+        account.add_order(order)
+    
+    # Load trades
+    cursor = conn.execute("SELECT * FROM trades WHERE account_id = ? ORDER BY timestamp, rowid", (account_id,))
+    for row in cursor:
+        trade = Trade(
+            id=row["id"],
+            symbol=row["symbol"],
+            direction=row["direction"],
+            quantity=row["quantity"],
+            price=row["price"],
+            timestamp=row["timestamp"],
+            commission=row["commission"]
+        )
+        account.trades.append(trade)
+    
+    # Load closed positions
+    cursor = conn.execute("SELECT * FROM closed_positions WHERE account_id = ? ORDER BY exit_time, rowid", (account_id,))
+    for row in cursor:
+        from .trading_models import ClosedPosition
+        closed_pos = ClosedPosition(
+            id=row["id"],
+            symbol=row["symbol"],
+            direction=row["direction"],
+            quantity=row["quantity"],
+            entry_price=row["entry_price"],
+            entry_time=row["entry_time"],
+            exit_price=row["exit_price"],
+            exit_time=row["exit_time"],
+            profit_loss=row["profit_loss"],
+            commission=row["commission"]
+        )
+        account.closed_positions.append(closed_pos)
+    
+    return account
 
 
 def save_account(account_id: int, account: Account) -> None:
     """Save account to database."""
     with _connect() as conn:
-        now = int(datetime.utcnow().timestamp())
-        
-        # Update account
+        _write_account(conn, account_id, account)
+        conn.commit()
+    _bump_version(account_id)
+
+
+def save_fills(account_id: int, account: Account, orders: List[Order], trades: List[Trade]) -> None:
+    """Save a batch of fills: trades, orders and the account in one transaction."""
+    with _connect() as conn:
+        conn.executemany(_INSERT_TRADE, [_trade_row(account_id, trade) for trade in trades])
+        conn.executemany(_INSERT_ORDER, [_order_row(account_id, order) for order in orders])
+        _write_account(conn, account_id, account)
+        conn.commit()
+    _bump_version(account_id)
+
+
+def _write_account(conn: sqlite3.Connection, account_id: int, account: Account) -> None:
+    now = int(time.time())
+    
+    # Update account
+    conn.execute(
+        """
+        UPDATE accounts 
+        SET balance = ?, last_update_time = ?
+        WHERE id = ?
+        """,
+        (account.balance, now, account_id)
+    )
+    
+    # Clear and update positions
+    conn.execute("DELETE FROM positions WHERE account_id = ?", (account_id,))
+    for pos in account.positions:
         conn.execute(
             """
-            UPDATE accounts 
-            SET balance = ?, last_update_time = ?
-            WHERE id = ?
+            INSERT INTO positions (account_id, symbol, quantity, entry_price, entry_time, take_profit_price, stop_loss_price)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
             """,
-            (account.balance, now, account_id)
+            (account_id, pos.symbol, pos.quantity, pos.entry_price, pos.entry_time, pos.take_profit_price, pos.stop_loss_price)
+        )
+    
+    # Clear and update closed positions
+    conn.execute("DELETE FROM closed_positions WHERE account_id = ?", (account_id,))
+    for closed_pos in account.closed_positions:
+        conn.execute(
+            """
+            INSERT INTO closed_positions 
+            (id, account_id, symbol, direction, quantity, entry_price, entry_time, exit_price, exit_time, profit_loss, commission)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (closed_pos.id, account_id, closed_pos.symbol, closed_pos.direction, closed_pos.quantity,
+             closed_pos.entry_price, closed_pos.entry_time, closed_pos.exit_price, closed_pos.exit_time,
+             closed_pos.profit_loss, closed_pos.commission)
         )
-        
-        # Clear and update positions
-        conn.execute("DELETE FROM positions WHERE account_id = ?", (account_id,))
-        for pos in account.positions:
-            conn.execute(
-                """
-                INSERT INTO positions (account_id, symbol, quantity, entry_price, entry_time, take_profit_price, stop_loss_price)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (account_id, pos.symbol, pos.quantity, pos.entry_price, pos.entry_time, pos.take_profit_price, pos.stop_loss_price)
-            )
-        
-        # Clear and update closed positions
-        conn.execute("DELETE FROM closed_positions WHERE account_id = ?", (account_id,))
-        for closed_pos in account.closed_positions:
-            conn.execute(
-                """
-                INSERT INTO closed_positions 
-                (id, account_id, symbol, direction, quantity, entry_price, entry_time, exit_price, exit_time, profit_loss, commission)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (closed_pos.id, account_id, closed_pos.symbol, closed_pos.direction, closed_pos.quantity,
-                 closed_pos.entry_price, closed_pos.entry_time, closed_pos.exit_price, closed_pos.exit_time,
-                 closed_pos.profit_loss, closed_pos.commission)
-            )
-        
-        conn.commit()
 
 
 def clear_orders(account_id: int) -> None:
@@ -327,6 +392,7 @@ def clear_orders(account_id: int) -> None:
     with _connect() as conn:
         conn.execute("DELETE FROM orders WHERE account_id = ?", (account_id,))
         conn.commit()
+    _bump_version(account_id)
 
 
 def clear_trades(account_id: int) -> None:
@@ -334,6 +400,7 @@ def clear_trades(account_id: int) -> None:
     with _connect() as conn:
         conn.execute("DELETE FROM trades WHERE account_id = ?", (account_id,))
         conn.commit()
+    _bump_version(account_id)
 
 
 def reset_account_stats(account_id: int) -> None:
@@ -361,42 +428,97 @@ def reset_account_stats(account_id: int) -> None:
             (account_id,)
         )
         conn.commit()
+    _STATS.pop(account_id, None)
+    _bump_version(account_id)
 
 
-def save_order(account_id: int, order: Order) -> None:
-    """Save order to database."""
+def reset_account_data(account_id: int, balance: float) -> None:
+    """Reset balance and drop positions, orders, trades, closed positions and stats in one transaction."""
     with _connect() as conn:
+        now = int(time.time())
+        conn.execute(
+            "UPDATE accounts SET balance = ?, last_update_time = ? WHERE id = ?",
+            (balance, now, account_id)
+        )
+        for table in ("positions", "orders", "trades", "closed_positions"):
+            conn.execute(f"DELETE FROM {table} WHERE account_id = ?", (account_id,))
         conn.execute(
             """
-            INSERT OR REPLACE INTO orders 
-            (id, account_id, symbol, direction, type, quantity, price, create_time, 
-             filled_time, filled_quantity, filled_price, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            UPDATE account_stats SET 
+                total_trades = 0,
+                winning_trades = 0,
+                losing_trades = 0,
+                win_rate = 0,
+                total_profit = 0,
+                total_loss = 0,
+                profit_factor = 0,
+                expectancy = 0,
+                max_drawdown = 0,
+                max_drawdown_pct = 0,
+                sharpe_ratio = 0,
+                cagr = 0,
+                cumulative_return = 0,
+                total_return = 0
+            WHERE account_id = ?
             """,
-            (order.id, account_id, order.symbol, order.direction, order.type, order.quantity,
-             order.price, order.create_time, order.filled_time, order.filled_quantity,
-             order.filled_price, order.status)
+            (account_id,)
         )
         conn.commit()
+    _STATS.pop(account_id, None)
+    _bump_version(account_id)
+
+
+_INSERT_ORDER = """
+    INSERT OR REPLACE INTO orders 
+    (id, account_id, symbol, direction, type, quantity, price, create_time, 
+     filled_time, filled_quantity, filled_price, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_INSERT_TRADE = """
+    INSERT OR REPLACE INTO trades 
+    (id, account_id, symbol, direction, quantity, price, timestamp, commission)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _order_row(account_id: int, order: Order) -> tuple:
+    return (order.id, account_id, order.symbol, order.direction, order.type, order.quantity,
+            order.price, order.create_time, order.filled_time, order.filled_quantity,
+            order.filled_price, order.status)
+
+
+def _trade_row(account_id: int, trade: Trade) -> tuple:
+    return (trade.id, account_id, trade.symbol, trade.direction, trade.quantity,
+            trade.price, trade.timestamp, trade.commission)
+
+
+def save_order(account_id: int, order: Order) -> None:
+    """Save order to database."""
+    with _connect() as conn:
+        conn.execute(_INSERT_ORDER, _order_row(account_id, order))
+        conn.commit()
+    _bump_version(account_id)
 
 
 def save_trade(account_id: int, trade: Trade) -> None:
     """Save trade to database."""
     with _connect() as conn:
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO trades 
-            (id, account_id, symbol, direction, quantity, price, timestamp, commission)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (trade.id, account_id, trade.symbol, trade.direction, trade.quantity,
-             trade.price, trade.timestamp, trade.commission)
-        )
+        conn.execute(_INSERT_TRADE, _trade_row(account_id, trade))
         conn.commit()
+    _bump_version(account_id)
+
+
+# Stats rows change only through save_account_stats/reset_account_stats below, so the
+# latest value is kept in memory and reads skip the query.
+_STATS: Dict[int, AccountStats] = {}
 
 
 def save_account_stats(account_id: int, stats: AccountStats) -> None:
-    """Save account stats to database."""
+    """Save account stats to database; a no-op when they match what is stored."""
+    # Stats are recomputed while serving /api/account-stats; bumping the version for an
+    # unchanged result would invalidate the response that is being built.
+    if get_account_stats(account_id) == stats:
+        return
     with _connect() as conn:
         conn.execute(
             """
@@ -413,32 +535,42 @@ def save_account_stats(account_id: int, stats: AccountStats) -> None:
              stats.cumulative_return, stats.total_return, account_id)
         )
         conn.commit()
+    _STATS[account_id] = stats
+    _bump_version(account_id)
 
 
 def get_account_stats(account_id: int) -> Optional[AccountStats]:
-    """Get account stats from database."""
+    """Get account stats, reading the database only on first use."""
+    cached = _STATS.get(account_id)
+    if cached is not None:
+        return cached
     with _connect() as conn:
-        cursor = conn.execute("SELECT * FROM account_stats WHERE account_id = ?", (account_id,))
-        row = cursor.fetchone()
-        if not row:
-            return None
-        
-        return AccountStats(
-            total_trades=row["total_trades"],
-            winning_trades=row["winning_trades"],
-            losing_trades=row["losing_trades"],
-            win_rate=row["win_rate"],
-            total_profit=row["total_profit"],
-            total_loss=row["total_loss"],
-            profit_factor=row["profit_factor"],
-            expectancy=row["expectancy"],
-            max_drawdown=row["max_drawdown"],
-            max_drawdown_pct=row["max_drawdown_pct"],
-            sharpe_ratio=row["sharpe_ratio"],
-            cagr=row["cagr"],
-            cumulative_return=row["cumulative_return"],
-            total_return=row["total_return"]
-        )
+        return _read_account_stats(conn, account_id)
+
+
+def _read_account_stats(conn: sqlite3.Connection, account_id: int) -> Optional[AccountStats]:
+    cursor = conn.execute("SELECT * FROM account_stats WHERE account_id = ?", (account_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    
+    stats = _STATS[account_id] = AccountStats(
+        total_trades=row["total_trades"],
+        winning_trades=row["winning_trades"],
+        losing_trades=row["losing_trades"],
+        win_rate=row["win_rate"],
+        total_profit=row["total_profit"],
+        total_loss=row["total_loss"],
+        profit_factor=row["profit_factor"],
+        expectancy=row["expectancy"],
+        max_drawdown=row["max_drawdown"],
+        max_drawdown_pct=row["max_drawdown_pct"],
+        sharpe_ratio=row["sharpe_ratio"],
+        cagr=row["cagr"],
+        cumulative_return=row["cumulative_return"],
+        total_return=row["total_return"]
+    )
+    return stats
 
 
 def get_account_id(mode: str, symbol: str, interval: str) -> Optional[int]:
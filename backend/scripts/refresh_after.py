@@ -9,10 +9,16 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterable
 
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop is unavailable on Windows
+    uvloop = None
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from app.binance_client import aclose_client  # noqa: E402
 from app.config import INSTRUMENTS, INTERVAL_SECONDS  # noqa: E402
 from app.data_provider import _ensure_range  # noqa: E402
 from app.storage import delete_after  # noqa: E402
@@ -62,8 +68,13 @@ async def main() -> None:
     for symbol in iter_symbols():
         delete_cached(symbol, cutoff_ts)
 
-    await asyncio.gather(*(refetch(symbol, cutoff_ts) for symbol in iter_symbols()))
+    try:
+        await asyncio.gather(*(refetch(symbol, cutoff_ts) for symbol in iter_symbols()))
+    finally:
+        await aclose_client()
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
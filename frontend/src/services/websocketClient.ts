@@ -42,37 +42,45 @@ export function subscribeToRealtime(options: RealtimeSubscriptionOptions): () =>
     }
   };
 
+  const emitPayload = (payload: any) => {
+    if (payload && payload.k) {
+      const k = payload.k;
+      const candle: Candle = {
+        time: Math.floor(Number(k.t) / 1000),
+        open: parseFloat(k.o),
+        high: parseFloat(k.h),
+        low: parseFloat(k.l),
+        close: parseFloat(k.c),
+        volume: parseFloat(k.v),
+      };
+      onCandle(candle, Boolean(k.x));
+      return;
+    }
+
+    const candlePayload = payload?.candle ?? payload;
+    if (candlePayload) {
+      const candle: Candle = {
+        time: Number(candlePayload.time),
+        open: Number(candlePayload.open),
+        high: Number(candlePayload.high),
+        low: Number(candlePayload.low),
+        close: Number(candlePayload.close),
+        volume: Number(candlePayload.volume),
+      };
+      const isFinal = typeof payload?.final === "boolean" ? Boolean(payload.final) : true;
+      onCandle(candle, isFinal);
+    }
+  };
+
   const parseAndEmit = (data: MessageEvent['data']) => {
     try {
       const payload = JSON.parse(data as string);
-
-      if (payload && payload.k) {
-        const k = payload.k;
-        const candle: Candle = {
-          time: Math.floor(Number(k.t) / 1000),
-          open: parseFloat(k.o),
-          high: parseFloat(k.h),
-          low: parseFloat(k.l),
-          close: parseFloat(k.c),
-          volume: parseFloat(k.v),
-        };
-        onCandle(candle, Boolean(k.x));
+      // The backend coalesces bursts into {"type": "batch", "updates": [...]}.
+      if (payload?.type === "batch" && Array.isArray(payload.updates)) {
+        payload.updates.forEach(emitPayload);
         return;
       }
-
-      const candlePayload = payload?.candle ?? payload;
-      if (candlePayload) {
-        const candle: Candle = {
-          time: Number(candlePayload.time),
-          open: Number(candlePayload.open),
-          high: Number(candlePayload.high),
-          low: Number(candlePayload.low),
-          close: Number(candlePayload.close),
-          volume: Number(candlePayload.volume),
-        };
-        const isFinal = typeof payload?.final === "boolean" ? Boolean(payload.final) : true;
-        onCandle(candle, isFinal);
-      }
+      emitPayload(payload);
     } catch (error) {
       console.error('[subscribeToRealtime] Failed to parse websocket payload', error);
     }
@@ -143,7 +151,15 @@ export function subscribeAccount(options: AccountWsOptions): () => void {
   const url = `${protocol}://${host}/ws/account?${params.toString()}`;
   const ws = new WebSocket(url);
   ws.onmessage = (e) => {
-    try { onEvent(JSON.parse(e.data)); } catch(err){ console.error(err); }
+    try {
+      const payload = JSON.parse(e.data);
+      // Bursts of events arrive as {"type": "batch", "events": [...]}.
+      if (payload?.type === 'batch' && Array.isArray(payload.events)) {
+        payload.events.forEach(onEvent);
+      } else {
+        onEvent(payload);
+      }
+    } catch(err){ console.error(err); }
   };
   return () => ws.close(1000, 'client');
 }